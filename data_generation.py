@@ -2,6 +2,7 @@ import random
 from datetime import datetime
 from typing import List, Optional, Tuple
 from models import Incident, IncidentContext, IncidentSeverity, IncidentStatus
+from ids import new_id
 
 
 class SyntheticIncidentGenerator:
@@ -71,7 +72,7 @@ class SyntheticIncidentGenerator:
             business_hours, peak_traffic, weekend = self._get_time_context(force_hour)
             
             incident = Incident(
-                id=f"INC-2025-{str(self.incident_counter).zfill(3)}",
+                id=new_id("INC-"),
                 title=template["title"],
                 description=template["incident_text"],
                 severity=template["severity"],
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from models import Incident, IncidentContext
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 15 * 60  # alert storms repeat within minutes, policies change slower
+
+def incident_fingerprint(incident: Incident, context: IncidentContext) -> str:
+    """Normalized hash of the incident fields that drive the tool decision."""
+    key = {
+        "service": incident.service.strip().lower(),
+        "severity": incident.severity.value,
+        "components": sorted({c.strip().lower() for c in incident.affected_components}),
+        "context": asdict(context),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+class DecisionCache:
+    """LRU + TTL cache of tool plans keyed by incident fingerprint.
+
+    A plan is a list of ``{"tool": name, "arguments": {...}}`` steps. When
+    ``db_path`` is given, entries are also written to SQLite so a restarted
+    worker keeps its warm cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        db_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS decision_cache (
+                    fingerprint TEXT PRIMARY KEY,
+                    plan TEXT NOT NULL,
+                    reasoning TEXT,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("DELETE FROM decision_cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return ``{"plan", "reasoning"}`` for a live entry, or None."""
+        now = time.time()
+        entry = self._entries.get(fingerprint)
+        if entry is not None and entry["expires_at"] < now:
+            del self._entries[fingerprint]
+            entry = None
+
+        if entry is None and self._conn is not None:
+            row = self._conn.execute(
+                "SELECT plan, reasoning, expires_at FROM decision_cache WHERE fingerprint = ? AND expires_at >= ?",
+                (fingerprint, now)
+            ).fetchone()
+            if row:
+                entry = {"plan": json.loads(row[0]), "reasoning": row[1], "expires_at": row[2]}
+                self._store(fingerprint, entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(fingerprint)
+        self.hits += 1
+        return {"plan": entry["plan"], "reasoning": entry["reasoning"]}
+
+    def put(self, fingerprint: str, plan: List[Dict[str, Any]], reasoning: str = ""):
+        entry = {"plan": plan, "reasoning": reasoning, "expires_at": time.time() + self.ttl_seconds}
+        self._store(fingerprint, entry)
+        if self._conn is not None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO decision_cache (fingerprint, plan, reasoning, expires_at) VALUES (?, ?, ?, ?)",
+                (fingerprint, json.dumps(plan), reasoning, entry["expires_at"])
+            )
+            self._conn.commit()
+
+    def _store(self, fingerprint: str, entry: Dict[str, Any]):
+        self._entries[fingerprint] = entry
+        self._entries.move_to_end(fingerprint)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,173 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  # httpx needs it for HTTP/2
+    _HTTP2_AVAILABLE = True
+except ImportError:  # optional dependency; fall back to HTTP/1.1 keepalive
+    _HTTP2_AVAILABLE = False
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return default if value is None else value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class HTTPClientConfig:
+    """Pool, keepalive, timeout and per-host concurrency settings for LLM backends."""
+    max_connections: int = 64
+    max_keepalive_connections: int = 16
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 120.0  # a long generation streams for a while
+    write_timeout: float = 10.0
+    pool_timeout: float = 30.0
+    per_host_limit: int = 16
+    http2: bool = True
+    verify: bool = True
+
+    @classmethod
+    def from_env(cls, **overrides) -> "HTTPClientConfig":
+        """Defaults overridden by LLM_HTTP_* environment variables, then ``overrides``."""
+        values = {
+            "max_connections": int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", cls.max_connections)),
+            "max_keepalive_connections": int(
+                os.getenv("LLM_HTTP_MAX_KEEPALIVE", cls.max_keepalive_connections)
+            ),
+            "keepalive_expiry": float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", cls.keepalive_expiry)),
+            "connect_timeout": float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", cls.connect_timeout)),
+            "read_timeout": float(os.getenv("LLM_HTTP_READ_TIMEOUT", cls.read_timeout)),
+            "per_host_limit": int(os.getenv("LLM_HTTP_PER_HOST_LIMIT", cls.per_host_limit)),
+            "http2": _env_flag("LLM_HTTP2", cls.http2),
+            "verify": _env_flag("LLM_HTTP_VERIFY", cls.verify),
+        }
+        values.update(overrides)
+        return cls(**values)
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees its per-host slot once closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Pooled async transport with at most ``per_host_limit`` requests in flight per host.
+
+    A slot is held until the response body is closed, so streamed LLM
+    responses count against the limit for as long as they are open.
+    """
+
+    def __init__(self, config: HTTPClientConfig):
+        self.config = config
+        self._transport = httpx.AsyncHTTPTransport(
+            verify=config.verify,
+            http2=config.http2 and _HTTP2_AVAILABLE,
+            limits=config.limits()
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def in_flight(self) -> Dict[str, int]:
+        """Requests currently holding a slot, by host."""
+        return dict(self._in_flight)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = f"{request.url.scheme}://{request.url.netloc.decode()}"
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.config.per_host_limit)
+
+        def release():
+            self._in_flight[host] -= 1
+            semaphore.release()
+
+        await semaphore.acquire()
+        self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+# One transport / client per config, shared by every agent in the process.
+_transports: Dict[HTTPClientConfig, HostLimitedTransport] = {}
+_clients: Dict[HTTPClientConfig, httpx.AsyncClient] = {}
+
+
+def get_async_transport(config: Optional[HTTPClientConfig] = None) -> HostLimitedTransport:
+    """Shared transport, for SDKs that build their own httpx client (e.g. ollama)."""
+    config = config or HTTPClientConfig.from_env()
+    transport = _transports.get(config)
+    if transport is None:
+        transport = _transports[config] = HostLimitedTransport(config)
+    return transport
+
+
+def get_async_client(config: Optional[HTTPClientConfig] = None) -> httpx.AsyncClient:
+    """Shared ``httpx.AsyncClient`` over the shared transport (e.g. for ChatOpenAI)."""
+    config = config or HTTPClientConfig.from_env()
+    client = _clients.get(config)
+    if client is None or client.is_closed:
+        client = _clients[config] = httpx.AsyncClient(
+            transport=get_async_transport(config),
+            timeout=config.timeout()
+        )
+    return client
+
+
+def ollama_client_kwargs(config: Optional[HTTPClientConfig] = None) -> Dict[str, object]:
+    """``async_client_kwargs`` for ChatOllama so it uses the shared pool."""
+    config = config or HTTPClientConfig.from_env()
+    return {"transport": get_async_transport(config), "timeout": config.timeout()}
+
+
+async def close_http_clients():
+    """Close every shared client and transport (call once at shutdown)."""
+    for client in list(_clients.values()):
+        await client.aclose()
+    for transport in list(_transports.values()):
+        await transport.aclose()
+    _clients.clear()
+    _transports.clear()
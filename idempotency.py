@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+DEFAULT_DB_PATH = "idempotency.db"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _normalize(value: Any) -> Any:
+    """Canonical form of tool arguments: case and whitespace do not matter."""
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def idempotency_key(incident_id: str, tool_name: str, arguments: Dict[str, Any]) -> str:
+    payload = json.dumps([incident_id, tool_name, _normalize(arguments)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """SQLite-backed record of completed outbound tool calls.
+
+    ``run()`` executes a call once per key: a repeat (LLM emitting the same
+    call twice, agent loop retry, queue redelivery after a crash) gets the
+    stored result back instead of creating another ticket or page.
+    Concurrent callers with the same key share one in-flight call. Error
+    results are not stored, so failed calls can be retried.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.replays = 0
+
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tool_calls (
+                idempotency_key TEXT PRIMARY KEY,
+                tool_name TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("DELETE FROM tool_calls WHERE created_at < ?", (time.time() - ttl_seconds,))
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT result FROM tool_calls WHERE idempotency_key = ? AND created_at >= ?",
+            (key, time.time() - self.ttl_seconds)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, tool_name: str, result: Dict[str, Any]):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tool_calls (idempotency_key, tool_name, result, created_at) VALUES (?, ?, ?, ?)",
+            (key, tool_name, json.dumps(result, default=str), time.time())
+        )
+        self._conn.commit()
+
+    async def run(
+        self,
+        key: str,
+        tool_name: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Return ``(result, replayed)`` for the call identified by ``key``."""
+        stored = self.get(key)
+        if stored is not None:
+            self.replays += 1
+            return stored, True
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.replays += 1
+            return await asyncio.shield(pending), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; don't log "exception never retrieved".
+            future.exception()
+            raise
+        else:
+            if not (isinstance(result, dict) and result.get("status") == "error"):
+                self.put(key, tool_name, result)
+            future.set_result(result)
+            return result, False
+        finally:
+            self._in_flight.pop(key, None)
+
+    def close(self):
+        self._conn.close()
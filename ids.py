@@ -0,0 +1,62 @@
+import hashlib
+import itertools
+import os
+import socket
+import time
+
+# ULID/snowflake-style IDs: 48-bit millisecond timestamp, 20-bit worker
+# component and 22-bit per-process sequence, encoded as fixed-width Crockford
+# base32 so that string order is time order. No locks and no DB round trip:
+# next() on itertools.count is atomic under the GIL, and the worker component
+# keeps parallel processes and hosts apart.
+TIMESTAMP_BITS = 48
+WORKER_BITS = 20
+SEQUENCE_BITS = 22
+ID_LENGTH = 18  # 90 bits / 5 bits per character
+
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_WORKER_MASK = (1 << WORKER_BITS) - 1
+_SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+_sequence = itertools.count()
+
+
+def _default_worker() -> int:
+    """Worker component from ID_WORKER_ID, else a hash of host and process."""
+    configured = os.getenv("ID_WORKER_ID")
+    if configured:
+        return int(configured) & _WORKER_MASK
+    digest = hashlib.blake2b(f"{socket.gethostname()}:{os.getpid()}".encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "big") & _WORKER_MASK
+
+
+_worker = _default_worker()
+
+
+def _reset_after_fork():
+    global _worker, _sequence
+    _worker = _default_worker()
+    _sequence = itertools.count()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(ID_LENGTH):
+        chars.append(_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_id(prefix: str = "") -> str:
+    """Return a unique, time-sortable ID, e.g. ``new_id("PD")``."""
+    millis = time.time_ns() // 1_000_000
+    value = (
+        (millis << (WORKER_BITS + SEQUENCE_BITS))
+        | (_worker << SEQUENCE_BITS)
+        | (next(_sequence) & _SEQUENCE_MASK)
+    )
+    return f"{prefix}{_encode(value)}"
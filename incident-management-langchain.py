@@ -15,6 +15,7 @@ from models import (
 )
 from data_generation import(SyntheticIncidentGenerator)
 from incident_management_orchestrator import (IncidentManagementSystem)
+from ticketing_agent import DEFAULT_DECISION_BATCH_SIZE
 
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
@@ -22,13 +23,11 @@ from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_ollama import ChatOllama
 from datetime import datetime
 import json
-import httpx 
 #from langchain.output_parsers import BaseOutputParser
 #from langchain.prompts import PromptTemplate
 #from langchain.output_parsers import StructuredOutputParser
 
 import json
-client = httpx.Client(verify=False)
 
 # Load environment variables
 load_dotenv()
@@ -68,16 +67,12 @@ async def main():
     scenarios = generator.generate_scenarios(count=5)
     print(f"✓ Generated {len(scenarios)} scenarios\n")
     
-    results = []
-    for i, (incident, context) in enumerate(scenarios, 1):
-        result = await ims.process_incident(incident, context)
-        results.append(result)
-        
-        if i < len(scenarios):
-            print("\n" + "▼" * 80 + "\n")
-            await asyncio.sleep(0.5)
+    # Incidents run concurrently so their tool calls share batch round trips;
+    # ambiguous ones are decided several per LLM call
+    results = await ims.process_incidents(scenarios, batch_size=DEFAULT_DECISION_BATCH_SIZE)
     
     ims.print_summary()
+    await ims.shutdown()
     
     # Save results
     output = {
@@ -1,9 +1,10 @@
 from models import Incident, IncidentReport, IncidentContext, Ticket
 from reporting_agent import ReportingAgent
 from ticketing_agent import IntelligentTicketingAgent
+from http_clients import close_http_clients
 from dataclasses import asdict
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 import asyncio, json
 
 
@@ -28,11 +29,16 @@ class IncidentManagementSystem:
         print("=" * 80)
         print("🚀 Intelligent Incident Management System (FastMCP-enabled)")
         print("=" * 80)
+        await self.ticketing_agent.start()
         print("✓ MCP tools registered (Jira, Slack, PagerDuty, etc.)")
         print("✓ LLM-driven decision engine ready\n")
 
-    async def process_incident(self, incident: Incident, context: IncidentContext) -> Dict[str, Any]:
-        """Process incident with LLM intelligence"""
+    async def shutdown(self):
+        await self.ticketing_agent.close()
+        await close_http_clients()
+
+    def _prepare_incident(self, incident: Incident, context: IncidentContext) -> IncidentReport:
+        """Register the incident and generate its report (Step 1)."""
 
         print(f"\n{'=' * 80}")
         print(f"📊 Processing: {incident.id}")
@@ -49,11 +55,87 @@ class IncidentManagementSystem:
         print("📝 Step 1: Generating Report...")
         print("-" * 80)
 
+        report = self.reporting_agent.generate_report(incident)
+        self.reports[incident.id] = report
+        print(f"✅ Report Generated")
+        print(f"   Report: {report}\n")
+        return report
+
+    def _record_decision(
+        self,
+        incident: Incident,
+        context: IncidentContext,
+        report: IncidentReport,
+        decision: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Store the executed decision and build the incident's result (Step 2 output)."""
+
+        print("------------- Decision Output -------------")
+        print(decision)
+
+        # ✅ FastMCP returns JSON already — no need to parse manually
+        if decision.get("key_factors"):
+            print("🔑 Key Factors:")
+            for factor in decision["key_factors"]:
+                print(f"   • {factor}")
+            print()
+
+        print(f"🎯 Decision (Confidence: {decision.get('confidence_level', 'medium')}):")
+        print(f"   • PagerDuty: {'YES' if decision.get('use_pagerduty') else 'NO'}")
+        print(f"   • Slack: {decision.get('slack_channel', 'NO') if decision.get('use_slack') else 'NO'}")
+        print(f"   • Jira: {decision.get('jira_priority', 'MEDIUM')}")
+        print()
+
+        # ✅ If your MCP agent triggers Jira/Slack/PagerDuty directly, 
+        # you might not need execute_decision anymore.
+        result = {
+            "tickets": decision.get("tickets", []),
+            "actions": decision.get("actions_taken", []),
+            "reasoning": decision.get("reasoning", ""),
+            "decision_summary": {
+                "pagerduty": decision.get("use_pagerduty", False),
+                "jira": decision.get("create_jira", False),
+                "slack": decision.get("use_slack", False),
+            },
+            "llm_decision": decision,
+        }
+
+        self.decisions[incident.id] = result
+
+        print("✅ Decision Executed via MCP Tools")
+        print("\nActions:")
+        for action in result["actions"]:
+            print(f"   {action}")
+        print()
+
+        outcome = {
+            "status": "success",
+            "incident_id": incident.id,
+            "severity": incident.severity.value,
+            "region": incident.region,
+            "context": asdict(context),
+            "report": asdict(report),
+            "tickets": [asdict(t) for t in result["tickets"]],
+            "decision": result["decision_summary"],
+            "actions": result["actions"],
+            "reasoning": result["reasoning"],
+            "llm_decision": result["llm_decision"],
+        }
+
+        summary = decision.get("decision_summary", {})
+        if not summary.get("completed", True):
+            # The agent loop stopped early (LLM down, timeout, budget): report
+            # a failure so the incident is retried instead of acknowledged.
+            print(f"⚠️  Agent loop did not finish: {summary.get('error')}")
+            outcome["status"] = "error"
+            outcome["message"] = f"Agent loop did not finish: {summary.get('error')}"
+        return outcome
+
+    async def process_incident(self, incident: Incident, context: IncidentContext) -> Dict[str, Any]:
+        """Process incident with LLM intelligence"""
+
         try:
-            report = self.reporting_agent.generate_report(incident)
-            self.reports[incident.id] = report
-            print(f"✅ Report Generated")
-            print(f"   Report: {report}\n")
+            report = self._prepare_incident(incident, context)
         except Exception as e:
             print(f"❌ Error generating report: {e}\n")
             return {"status": "error", "message": str(e)}
@@ -64,62 +146,77 @@ class IncidentManagementSystem:
 
         try:
             decision = await self.ticketing_agent.make_decision_and_execute(incident, context)
+            return self._record_decision(incident, context, report, decision)
 
-            print("------------- Decision Output -------------")
-            print(decision)
+        except Exception as e:
+            print(f"❌ Error during decision phase: {e}\n")
+            return {"status": "error", "message": str(e)}
 
-            # ✅ FastMCP returns JSON already — no need to parse manually
-            if decision.get("key_factors"):
-                print("🔑 Key Factors:")
-                for factor in decision["key_factors"]:
-                    print(f"   • {factor}")
-                print()
+    async def process_incidents(
+        self,
+        scenarios: List[Tuple[Incident, IncidentContext]],
+        max_concurrency: int = 8,
+        batch_size: int = 1
+    ) -> List[Dict[str, Any]]:
+        """Process several incidents concurrently (results in input order).
 
-            print(f"🎯 Decision (Confidence: {decision.get('confidence_level', 'medium')}):")
-            print(f"   • PagerDuty: {'YES' if decision.get('use_pagerduty') else 'NO'}")
-            print(f"   • Slack: {decision.get('slack_channel', 'NO') if decision.get('use_slack') else 'NO'}")
-            print(f"   • Jira: {decision.get('jira_priority', 'MEDIUM')}")
-            print()
+        Tool calls from incidents in flight together are grouped by the
+        agent's tool batcher into one call per backend per flush window.
+        With ``batch_size`` > 1, ambiguous incidents are decided
+        ``batch_size`` per LLM call instead of one conversation each.
+        """
+        if batch_size > 1:
+            return await self._process_incidents_batched(scenarios, batch_size)
 
-            # ✅ If your MCP agent triggers Jira/Slack/PagerDuty directly, 
-            # you might not need execute_decision anymore.
-            result = {
-                "tickets": [],
-                "actions": decision.get("actions_taken", []),
-                "reasoning": decision.get("reasoning", ""),
-                "decision_summary": {
-                    "pagerduty": decision.get("use_pagerduty", False),
-                    "jira": decision.get("create_jira", False),
-                    "slack": decision.get("use_slack", False),
-                },
-                "llm_decision": decision,
-            }
-
-            self.decisions[incident.id] = result
-
-            print("✅ Decision Executed via MCP Tools")
-            print("\nActions:")
-            for action in result["actions"]:
-                print(f"   {action}")
-            print()
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(incident: Incident, context: IncidentContext) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.process_incident(incident, context)
+
+        return await asyncio.gather(*(run(incident, context) for incident, context in scenarios))
 
-            return {
-                "status": "success",
-                "incident_id": incident.id,
-                "severity": incident.severity.value,
-                "region": incident.region,
-                "context": asdict(context),
-                "report": asdict(report),
-                "tickets": [asdict(t) for t in result["tickets"]],
-                "decision": result["decision_summary"],
-                "actions": result["actions"],
-                "reasoning": result["reasoning"],
-                "llm_decision": result["llm_decision"],
-            }
+    async def _process_incidents_batched(
+        self,
+        scenarios: List[Tuple[Incident, IncidentContext]],
+        batch_size: int
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = [None] * len(scenarios)
+        prepared = []
+        for index, (incident, context) in enumerate(scenarios):
+            try:
+                prepared.append((index, incident, context, self._prepare_incident(incident, context)))
+            except Exception as e:
+                print(f"❌ Error generating report: {e}\n")
+                results[index] = {"status": "error", "message": str(e)}
 
+        print(f"🎯 Step 2: LLM Making Batched Decisions via MCP ({len(prepared)} incidents)...")
+        print("-" * 80)
+
+        try:
+            decisions = await self.ticketing_agent.make_batch_decisions(
+                [(incident, context) for _, incident, context, _ in prepared], batch_size
+            )
         except Exception as e:
             print(f"❌ Error during decision phase: {e}\n")
-            return {"status": "error", "message": str(e)}
+            for index, *_ in prepared:
+                results[index] = {"status": "error", "message": str(e)}
+            return results
+
+        for (index, incident, context, report), decision in zip(prepared, decisions):
+            try:
+                results[index] = self._record_decision(incident, context, report, decision)
+            except Exception as e:
+                print(f"❌ Error during decision phase: {e}\n")
+                results[index] = {"status": "error", "message": str(e)}
+        return results
+
+    def forget_incident(self, incident_id: str):
+        """Drop the in-memory state kept for an incident (long-lived workers)."""
+        self.incidents.pop(incident_id, None)
+        self.reports.pop(incident_id, None)
+        self.tickets.pop(incident_id, None)
+        self.decisions.pop(incident_id, None)
 
     def _format_context(self, context: IncidentContext) -> str:
         parts = []
@@ -154,4 +251,56 @@ class IncidentManagementSystem:
         print(f"\nTotal Incidents: {total}")
         print(f"PagerDuty Escalations: {pagerduty_count}")
         print(f"Jira Only (No Wake): {total - pagerduty_count}")
+
+        paths = self.ticketing_agent.path_counts
+        print(f"Decision Paths: policy {paths['policy']} | cache {paths['cache']} | "
+              f"batch {paths['batch']} | LLM {paths['llm']}")
+        print(f"Batched LLM Calls: {self.ticketing_agent.batch_llm_calls}")
+
+        first_actions = [
+            d["llm_decision"]["decision_summary"].get("time_to_first_action_s") for d in self.decisions.values()
+        ]
+        first_actions = [t for t in first_actions if t is not None]
+        if first_actions:
+            print(f"Avg Time to First Action (LLM path): {sum(first_actions) / len(first_actions):.2f}s")
+
+        budgets = [
+            d["llm_decision"]["decision_summary"]["budget"] for d in self.decisions.values()
+            if "budget" in d["llm_decision"]["decision_summary"]
+        ]
+        if budgets:
+            over = sum(1 for b in budgets if b["exhausted"])
+            print(f"LLM Decisions: {len(budgets)} | tokens {sum(b['tokens_used'] for b in budgets)} | "
+                  f"stopped by budget {over}")
+
+        for router, stats in self.ticketing_agent.llm_stats().items():
+            for backend, latency in stats["backends"].items():
+                if latency["calls"]:
+                    print(f"LLM {router}/{backend}: p50 {latency['p50_s']}s | p99 {latency['p99_s']}s | "
+                          f"calls {latency['calls']} | errors {latency['errors']}")
+            if stats["hedges"] or stats["failovers"]:
+                print(f"LLM {router}: hedged {stats['hedges']} | failed over {stats['failovers']}")
+
+        for tool, health in self.ticketing_agent.tool_health().items():
+            if health["state"] != "closed" or health["rejected"] or health["bulkhead_rejected"]:
+                print(f"Tool {tool}: circuit {health['state']} | failures {health['window_failures']}/"
+                      f"{health['window_calls']} | fast-failed {health['rejected']} | "
+                      f"bulkhead rejected {health['bulkhead_rejected']}")
+
+        outbox = self.ticketing_agent.slack_outbox
+        if outbox and outbox.coalesced:
+            stats = outbox.stats()
+            print(f"Slack Alerts: sent {stats['sent_immediately']} | folded into digests {stats['coalesced']} | "
+                  f"digests sent {stats['digests_sent']} | digest failures {stats['digest_failures']} | "
+                  f"undelivered {stats['dropped']}")
+
+        for backend, limits in self.ticketing_agent.llm_limit_metrics().items():
+            concurrency = limits["concurrency"]
+            print(f"LLM {backend} limits: concurrency {concurrency['in_flight']}/{concurrency['limit']} | "
+                  f"avg queue {concurrency['avg_queue_delay_s']}s | max queue {concurrency['max_queue_delay_s']}s | "
+                  f"overloads {concurrency['overloads']}")
+            if limits["tokens"]:
+                print(f"LLM {backend} tokens: {limits['tokens']['tokens_available']}/"
+                      f"{limits['tokens']['tokens_per_minute']} per min | throttled {limits['tokens']['throttled_s']}s")
+        print(f"LLM Calls Saved by Early Completion: {self.ticketing_agent.llm_calls_saved}")
         print(f"\n{'=' * 80}\n")
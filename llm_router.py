@@ -0,0 +1,299 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from langchain_core.runnables import Runnable
+
+from http_clients import HTTPClientConfig, get_async_client
+from rate_limit import AdaptiveConcurrencyLimiter, TokenBucket, is_overload
+from token_budget import count_message_tokens
+
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_HEDGE_DELAY = 5.0  # used until a backend has enough samples
+MIN_HEDGE_DELAY = 0.25
+MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+EXPECTED_OUTPUT_TOKENS = 256  # reserved from the token bucket until real usage is known
+
+T = TypeVar("T")
+
+
+class LatencyStats:
+    """Rolling window of response latencies for one backend."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.wins = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+    def summary(self) -> Dict[str, Any]:
+        p50, p99 = self.percentile(50), self.percentile(99)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "wins": self.wins,
+            "p50_s": round(p50, 3) if p50 is not None else None,
+            "p99_s": round(p99, 3) if p99 is not None else None,
+        }
+
+
+@dataclass
+class LLMBackend:
+    name: str
+    runnable: Runnable
+    stats: LatencyStats = field(default_factory=LatencyStats)
+    # Shared by every router that talks to the same backend
+    limiter: Optional[AdaptiveConcurrencyLimiter] = None
+    token_bucket: Optional[TokenBucket] = None
+
+
+class ModelRouter:
+    """Sends each LLM call to the first backend, hedging and failing over to the rest.
+
+    If the current request has not answered within the backend's
+    ``hedge_percentile`` latency, the same request also goes to the next
+    backend and the first answer wins (the other is cancelled). An error
+    fails over to the next backend immediately. Latency is the full
+    response for ``ainvoke`` and the first chunk for ``astream``.
+    """
+
+    def __init__(
+        self,
+        backends: List[LLMBackend],
+        hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        default_hedge_delay: float = DEFAULT_HEDGE_DELAY,
+        min_hedge_delay: float = MIN_HEDGE_DELAY,
+        min_samples: int = MIN_SAMPLES
+    ):
+        if not backends:
+            raise ValueError("ModelRouter needs at least one backend")
+        self.backends = backends
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.hedges = 0
+        self.failovers = 0
+
+    def hedge_delay(self, backend: LLMBackend) -> float:
+        if len(backend.stats.samples) < self.min_samples:
+            return self.default_hedge_delay
+        return max(backend.stats.percentile(self.hedge_percentile), self.min_hedge_delay)
+
+    async def _timed(
+        self,
+        backend: LLMBackend,
+        call: Callable[[], Awaitable[T]],
+        cost: int,
+        race: Dict[str, bool],
+        hold: bool = False
+    ) -> T:
+        """One backend call behind its token bucket and concurrency limiter.
+
+        With ``hold`` a successful call keeps its limiter slot; the caller
+        releases it (streams hold the slot until they are fully read).
+        """
+        if backend.token_bucket is not None and cost:
+            await backend.token_bucket.acquire(cost)
+        if backend.limiter is not None:
+            await backend.limiter.acquire()
+
+        outcome = "ignore"
+        held = False
+        started = time.monotonic()
+        backend.stats.calls += 1
+        try:
+            result = await call()
+            outcome = "success"
+            held = hold
+        except asyncio.CancelledError:
+            # A hedged loser is at least this slow; dropping it would bias p99 low
+            backend.stats.record(time.monotonic() - started)
+            # Abandoned by the caller's timeout (not a lost hedge): overload signal
+            outcome = "overload" if race["abandoned"] else "ignore"
+            raise
+        except Exception as e:
+            backend.stats.errors += 1
+            outcome = "overload" if is_overload(e) else "ignore"
+            raise
+        finally:
+            if backend.limiter is not None and not held:
+                await backend.limiter.release(outcome)
+        backend.stats.record(time.monotonic() - started)
+        used = _total_tokens(result)
+        if backend.token_bucket is not None and used:
+            backend.token_bucket.adjust(used - cost)
+        return result
+
+    async def _race(
+        self,
+        start: Callable[[LLMBackend], Awaitable[T]],
+        cost: int = 0,
+        hold: bool = False,
+        discard: Optional[Callable[[T], Awaitable[None]]] = None
+    ) -> T:
+        """Run ``start`` on backends in order with hedging and failover; first success wins.
+
+        ``discard`` cleans up a success that finished alongside the winner.
+        """
+        remaining = list(self.backends)
+        pending: Dict[asyncio.Task, LLMBackend] = {}
+        last_error: Optional[BaseException] = None
+        race = {"abandoned": False}
+
+        def launch() -> LLMBackend:
+            backend = remaining.pop(0)
+            task = asyncio.create_task(self._timed(backend, lambda: start(backend), cost, race, hold))
+            pending[task] = backend
+            return backend
+
+        latest = launch()
+        try:
+            while pending:
+                timeout = self.hedge_delay(latest) if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedges += 1
+                    print(f"⏱️  {latest.name} slower than its p{self.hedge_percentile:g} "
+                          f"({timeout:.2f}s) - hedging to {remaining[0].name}")
+                    latest = launch()
+                    continue
+
+                winner = None
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        print(f"⚠️  LLM backend {backend.name} failed: {last_error}")
+                    elif winner is None:
+                        backend.stats.wins += 1
+                        winner = task
+                    elif discard is not None:
+                        await discard(task.result())
+                if winner is not None:
+                    return winner.result()
+
+                if not pending and remaining:
+                    self.failovers += 1
+                    print(f"↪️  Failing over to {remaining[0].name}")
+                    latest = launch()
+            raise last_error
+        except asyncio.CancelledError:
+            race["abandoned"] = True
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def ainvoke(self, messages: Any, **kwargs) -> Any:
+        return await self._race(
+            lambda backend: backend.runnable.ainvoke(messages, **kwargs), _estimate_tokens(messages)
+        )
+
+    async def astream(self, messages: Any, **kwargs) -> AsyncIterator[Any]:
+        """Race backends to the first chunk, then stream the winner.
+
+        Once a chunk has been yielded there is no failover: a mid-stream
+        error propagates to the caller. The winner's limiter slot is held
+        until the stream is fully read or closed; a mid-stream timeout, 429
+        or 503, or the caller abandoning the stream, counts as an overload.
+        """
+        cost = _estimate_tokens(messages)
+        backend, stream, first = await self._race(
+            lambda backend: _first_chunk(backend, messages, kwargs), cost, hold=True, discard=_close_stream
+        )
+        outcome = "ignore"
+        used = _total_tokens(first)
+        try:
+            if stream is not None:
+                yield first
+                async for chunk in stream:
+                    used += _total_tokens(chunk)
+                    yield chunk
+            outcome = "success"
+        except asyncio.CancelledError:
+            outcome = "overload"
+            raise
+        except Exception as e:
+            backend.stats.errors += 1
+            outcome = "overload" if is_overload(e) else "ignore"
+            raise
+        finally:
+            if stream is not None:
+                await stream.aclose()
+            if backend.limiter is not None:
+                await backend.limiter.release(outcome)
+            if backend.token_bucket is not None and used:
+                backend.token_bucket.adjust(used - cost)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backends": {backend.name: backend.stats.summary() for backend in self.backends},
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+        }
+
+
+def _total_tokens(message: Any) -> int:
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens", 0) if usage else 0
+
+
+def _estimate_tokens(messages: Any) -> int:
+    if not isinstance(messages, list):
+        return 0
+    return count_message_tokens(messages) + EXPECTED_OUTPUT_TOKENS
+
+
+async def _first_chunk(
+    backend: LLMBackend,
+    messages: Any,
+    kwargs: Dict[str, Any]
+) -> Tuple[LLMBackend, Optional[AsyncIterator[Any]], Any]:
+    stream = backend.runnable.astream(messages, **kwargs).__aiter__()
+    try:
+        return backend, stream, await stream.__anext__()
+    except StopAsyncIteration:
+        return backend, None, None
+    except BaseException:
+        await stream.aclose()
+        raise
+
+
+async def _close_stream(result: Tuple[LLMBackend, Optional[AsyncIterator[Any]], Any]):
+    """Drop a first-chunk winner that lost the tie: close its stream, free its slot."""
+    backend, stream, _ = result
+    if stream is not None:
+        await stream.aclose()
+    if backend.limiter is not None:
+        await backend.limiter.release("ignore")
+
+
+def secondary_llm_from_env(http_config: Optional[HTTPClientConfig] = None):
+    """OpenAI-compatible fallback model from LLM_SECONDARY_* settings, or None if unset."""
+    base_url = os.getenv("LLM_SECONDARY_BASE_URL")
+    if not base_url:
+        return None
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        base_url=base_url,
+        model=os.getenv("LLM_SECONDARY_MODEL", "gpt-4o"),
+        api_key=os.getenv("LLM_SECONDARY_API_KEY"),
+        temperature=0.7,
+        http_async_client=get_async_client(http_config)
+    )
@@ -0,0 +1,237 @@
+import asyncio
+import json
+from collections import defaultdict
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_BATCH_WINDOW = 0.025  # seconds a tool call waits for others to join its batch
+DEFAULT_MAX_BATCH_SIZE = 100
+
+# Single-item tool -> batch variant on the IncidentTools server.
+BATCH_TOOLS = {
+    "create_jira_issue": "create_jira_issues",
+    "send_slack_alert": "send_slack_alerts",
+    "create_pagerduty_incident": "create_pagerduty_incidents",
+}
+
+ToolHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def _decode_result(result: Any) -> Dict[str, Any]:
+    """Turn a FastMCP call_tool result into the tool's dict payload."""
+    data = getattr(result, "data", None)
+    if isinstance(data, dict):
+        return data
+    structured = getattr(result, "structured_content", None)
+    if isinstance(structured, dict):
+        return structured
+
+    # Older clients return the list of content blocks directly.
+    content = getattr(result, "content", result)
+    for block in content or []:
+        text = getattr(block, "text", None)
+        if text:
+            try:
+                return json.loads(text)
+            except ValueError:
+                return {"status": "success", "message": text}
+    return {"status": "success"}
+
+
+class BatchItemError(RuntimeError):
+    """One item of a batch tool call failed on the server."""
+
+
+class ToolBatcher:
+    """Groups single tool calls from many incidents into batch calls.
+
+    Calls to the same tool that arrive within ``flush_window`` seconds of the
+    first one are sent as one call to the tool's batch variant; each caller
+    gets its own item result (or BatchItemError) back.
+    """
+
+    def __init__(
+        self,
+        client: "MCPToolClient",
+        flush_window: float = DEFAULT_BATCH_WINDOW,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+    ):
+        self.client = client
+        self.flush_window = flush_window
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, List] = defaultdict(list)
+        self._timers: Dict[str, asyncio.Task] = {}
+        # The loop only holds tasks weakly: keep every flush alive until it is done
+        self._flushes: Set[asyncio.Task] = set()
+        self.batches_sent = 0
+        self.items_sent = 0
+
+    async def call(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[name].append((arguments, future))
+        if len(self._pending[name]) >= self.max_batch_size:
+            self._flush_now(name)
+        elif name not in self._timers:
+            self._timers[name] = self._spawn(self._flush_later(name))
+        return await future
+
+    def _spawn(self, flush: Awaitable[None]) -> asyncio.Task:
+        task = asyncio.create_task(flush)
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+        return task
+
+    async def _flush_later(self, name: str):
+        await asyncio.sleep(self.flush_window)
+        self._timers.pop(name, None)
+        await self._flush(name)
+
+    def _flush_now(self, name: str):
+        timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+        self._spawn(self._flush(name))
+
+    async def _flush(self, name: str):
+        items = self._pending.pop(name, [])
+        if not items:
+            return
+        self.batches_sent += 1
+        self.items_sent += len(items)
+        try:
+            response = await self.client.call_tool(
+                BATCH_TOOLS[name], {"requests": [arguments for arguments, _ in items]}
+            )
+            results = response.get("results", [])
+            if len(results) != len(items):
+                raise RuntimeError(f"{BATCH_TOOLS[name]} returned {len(results)} result(s) for {len(items)} request(s)")
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(items, results):
+            if future.done():
+                continue
+            if isinstance(result, dict) and result.get("status") == "error":
+                future.set_exception(BatchItemError(result.get("message", "batch item failed")))
+            else:
+                future.set_result(result)
+
+
+class MCPToolClient:
+    """Pool of long-lived client sessions to the IncidentTools FastMCP server.
+
+    ``target`` is the URL of a server started with the streamable HTTP
+    transport (``python mcps.py --transport http``), so many workers can share
+    one tool server. Without a URL the server from ``mcps`` is used
+    in-process. Sessions are opened once in ``start()`` and reused for every
+    call instead of connecting per tool invocation.
+    """
+
+    def __init__(self, target: Optional[str] = None, pool_size: int = DEFAULT_POOL_SIZE):
+        self.target = target
+        self.pool_size = pool_size
+        self.tool_names: List[str] = []
+        self._server: Any = None
+        self._clients: List[Client] = []
+        self._idle: Optional[asyncio.Queue] = None
+        # Sessions whose transport failed; reopened before their next use
+        self._broken: Set[Client] = set()
+
+    @property
+    def started(self) -> bool:
+        return self._idle is not None
+
+    async def start(self):
+        if self.started:
+            return
+        if self.target:
+            server = self.target
+        else:
+            from mcps import mcp as server
+        self._server = server
+
+        idle = asyncio.Queue()
+        try:
+            for _ in range(self.pool_size):
+                client = Client(server)
+                await client.__aenter__()
+                self._clients.append(client)
+                idle.put_nowait(client)
+
+            tools = await self._clients[0].list_tools()
+        except Exception:
+            await self.close()
+            raise
+        self.tool_names = [tool.name for tool in tools]
+        self._idle = idle
+        print(f"🔌 MCP tool client connected to {self.target or 'in-process IncidentTools'} "
+              f"({self.pool_size} session(s), tools: {', '.join(self.tool_names)})")
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        client = await self._idle.get()
+        try:
+            if client in self._broken:
+                client = await self._reopen(client)
+            result = await client.call_tool(name, arguments)
+        except ToolError:
+            raise  # the tool failed; the session is fine
+        except Exception as e:
+            # Transport / session failure (e.g. the tool server restarted):
+            # don't hand a dead session back to the pool.
+            if client not in self._broken:
+                print(f"⚠️  MCP session failed ({e}) - reconnecting")
+                self._broken.add(client)
+                try:
+                    client = await self._reopen(client)
+                except Exception as reopen_error:
+                    print(f"⚠️  MCP reconnect failed, retrying on next use: {reopen_error}")
+            raise
+        finally:
+            self._idle.put_nowait(client)
+        return _decode_result(result)
+
+    async def _reopen(self, client: Client) -> Client:
+        """Close a failed session and open a fresh one in its place."""
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception:
+            pass
+        fresh = Client(self._server)
+        await fresh.__aenter__()
+        self._broken.discard(client)
+        self._clients = [fresh if c is client else c for c in self._clients]
+        return fresh
+
+    def build_registry(self, batcher: Optional[ToolBatcher] = None) -> Dict[str, ToolHandler]:
+        """Tool name -> async handler taking the tool arguments.
+
+        With a ``batcher``, tools whose batch variant the server exposes are
+        routed through it. Batch variants themselves are not registered.
+        """
+        batch_names = set(BATCH_TOOLS.values())
+        registry = {}
+        for name in self.tool_names:
+            if name in batch_names:
+                continue
+            if batcher is not None and BATCH_TOOLS.get(name) in self.tool_names:
+                registry[name] = partial(batcher.call, name)
+            else:
+                registry[name] = partial(self.call_tool, name)
+        return registry
+
+    async def close(self):
+        clients, self._clients = self._clients, []
+        self._idle = None
+        self._broken.clear()
+        for client in clients:
+            try:
+                await client.__aexit__(None, None, None)
+            except Exception as e:
+                print(f"⚠️  Error closing MCP session: {e}")
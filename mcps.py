@@ -1,23 +1,87 @@
 from fastmcp import FastMCP
+import argparse
 import asyncio
-from datetime import datetime
+import os
+from typing import Any, Awaitable, Callable, Dict, List
+
+from ids import new_id
 
 mcp = FastMCP("IncidentTools")
 
-@mcp.tool()
-async def create_jira_issue(project: str, summary: str, description: str, priority: str) -> dict:
+
+async def _create_jira_issue(project: str, summary: str, description: str, priority: str) -> dict:
     print("--------------Jira MCP Triggered---------------")
-    ticket_id = f"INCIDENT-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    ticket_id = new_id("INCIDENT-")
     return {"status": "success", "ticket_id": ticket_id, "url": f"https://jira.company.com/browse/{ticket_id}", "priority": priority}
 
+
+async def _send_slack_alert(channel: str, severity: str, message: str) -> dict:
+    return {"status": "success", "channel": channel}
+
+
+async def _create_pagerduty_incident(title: str, description: str, urgency: str, service_id: str) -> dict:
+    incident_id = new_id("PD")
+    return {"status": "success", "incident_id": incident_id, "url": f"https://company.pagerduty.com/incidents/{incident_id}"}
+
+
+async def _run_batch(handler: Callable[..., Awaitable[dict]], requests: List[Dict[str, Any]]) -> dict:
+    """Run one handler over many requests; a failing item never fails the batch."""
+    async def run_item(request: Dict[str, Any]) -> dict:
+        # Bad arguments raise here, inside the item, not while building the batch.
+        return await handler(**request)
+
+    outcomes = await asyncio.gather(*(run_item(request) for request in requests), return_exceptions=True)
+
+    results = []
+    errors = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            message = f"{type(outcome).__name__}: {outcome}"
+            results.append({"status": "error", "message": message})
+            errors.append({"index": index, "message": message})
+        else:
+            results.append(outcome)
+    return {"status": "success" if not errors else "partial", "results": results, "errors": errors}
+
+
+@mcp.tool()
+async def create_jira_issue(project: str, summary: str, description: str, priority: str) -> dict:
+    return await _create_jira_issue(project, summary, description, priority)
+
 @mcp.tool()
 async def send_slack_alert(channel: str, severity: str, message: str) -> dict:
-    return {"status": "success", "channel": channel}
+    return await _send_slack_alert(channel, severity, message)
 
 @mcp.tool()
 async def create_pagerduty_incident(title: str, description: str, urgency: str, service_id: str) -> dict:
-    incident_id = f"PD{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    return {"status": "success", "incident_id": incident_id, "url": f"https://company.pagerduty.com/incidents/{incident_id}"}
+    return await _create_pagerduty_incident(title, description, urgency, service_id)
+
+
+# Batch variants: each request takes the arguments of the single-item tool.
+# ``results`` is aligned with ``requests``; failed items also appear in ``errors``.
+
+@mcp.tool()
+async def create_jira_issues(requests: List[Dict[str, Any]]) -> dict:
+    return await _run_batch(_create_jira_issue, requests)
+
+@mcp.tool()
+async def send_slack_alerts(requests: List[Dict[str, Any]]) -> dict:
+    return await _run_batch(_send_slack_alert, requests)
+
+@mcp.tool()
+async def create_pagerduty_incidents(requests: List[Dict[str, Any]]) -> dict:
+    return await _run_batch(_create_pagerduty_incident, requests)
 
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
+    parser = argparse.ArgumentParser(description="IncidentTools MCP server")
+    parser.add_argument("--transport", choices=["stdio", "http"], default=os.getenv("MCP_TRANSPORT", "stdio"))
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8765")))
+    args = parser.parse_args()
+
+    if args.transport == "http":
+        # One shared server for many workers; clients connect to
+        # http://<host>:<port>/mcp and keep their sessions open.
+        mcp.run(transport="streamable-http", host=args.host, port=args.port)
+    else:
+        mcp.run(transport="stdio")
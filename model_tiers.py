@@ -0,0 +1,74 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from models import Incident, IncidentContext, IncidentSeverity
+
+# Every tier runs the agent's default model unless LLM_<TIER>_MODEL names
+# another, so a default install only needs that one model pulled.
+DEFAULT_MODEL = "llama3.2"
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """Model and per-incident budgets for one class of incident."""
+    name: str
+    model: str
+    temperature: float
+    max_iterations: int
+    token_budget: int  # prompt + completion tokens across the whole agent loop
+    max_output_tokens: int  # per LLM call (Ollama num_predict)
+    wall_time_budget: float  # seconds for the whole agent loop
+
+
+DEFAULT_TIERS = {
+    "fast": ModelTier(
+        name="fast",
+        model=os.getenv("LLM_FAST_MODEL", DEFAULT_MODEL),
+        temperature=0.2,
+        max_iterations=3,
+        token_budget=6000,
+        max_output_tokens=512,
+        wall_time_budget=20.0,
+    ),
+    "standard": ModelTier(
+        name="standard",
+        model=os.getenv("LLM_STANDARD_MODEL", DEFAULT_MODEL),
+        temperature=0.3,
+        max_iterations=5,
+        token_budget=12000,
+        max_output_tokens=1024,
+        wall_time_budget=45.0,
+    ),
+    "strong": ModelTier(
+        name="strong",
+        model=os.getenv("LLM_STRONG_MODEL", DEFAULT_MODEL),
+        temperature=0.2,
+        max_iterations=10,
+        token_budget=30000,
+        max_output_tokens=2048,
+        wall_time_budget=90.0,
+    ),
+}
+
+
+class TieringPolicy:
+    """Pick a ModelTier from incident severity and context.
+
+    CRITICAL incidents, and HIGH ones with customer or revenue impact, get
+    the strong model. Other HIGH incidents and revenue-impacting MEDIUM ones
+    get the standard model; everything else uses the small, fast one.
+    """
+
+    def __init__(self, tiers: Optional[Dict[str, ModelTier]] = None):
+        self.tiers = dict(DEFAULT_TIERS if tiers is None else tiers)
+
+    def select(self, incident: Incident, context: IncidentContext) -> ModelTier:
+        severity = incident.severity
+        impact = context.customer_facing or context.revenue_impacting
+
+        if severity == IncidentSeverity.CRITICAL or (severity == IncidentSeverity.HIGH and impact):
+            return self.tiers["strong"]
+        if severity == IncidentSeverity.HIGH or (severity == IncidentSeverity.MEDIUM and context.revenue_impacting):
+            return self.tiers["standard"]
+        return self.tiers["fast"]
@@ -0,0 +1,185 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from models import Incident, IncidentContext, IncidentSeverity
+
+POLICY_JIRA_PROJECT = "OPS"
+
+JIRA_PRIORITY = {
+    IncidentSeverity.CRITICAL: "Highest",
+    IncidentSeverity.HIGH: "High",
+    IncidentSeverity.MEDIUM: "Medium",
+    IncidentSeverity.LOW: "Low",
+}
+
+SLACK_CHANNEL = {
+    IncidentSeverity.CRITICAL: "#incidents-critical",
+    IncidentSeverity.HIGH: "#incidents-high",
+    IncidentSeverity.MEDIUM: "#incidents",
+    IncidentSeverity.LOW: "#incidents",
+}
+
+
+def incident_summary(incident: Incident) -> str:
+    return f"[{incident.severity.value.upper()}] {incident.title} ({incident.id})"
+
+
+def incident_description(incident: Incident, decision: str) -> str:
+    return (
+        f"{incident.description}\n\n"
+        f"Service: {incident.service} | Region: {incident.region}\n"
+        f"Affected components: {', '.join(incident.affected_components)}\n"
+        f"Decision: {decision}"
+    )
+
+
+def with_incident_text(plan: List[Dict[str, Any]], incident: Incident, decision: str) -> List[Dict[str, Any]]:
+    """Rewrite a plan's free-text arguments (titles, descriptions, Slack message) for ``incident``.
+
+    Everything else in the plan (project, priority, channel, urgency, ...)
+    is kept as decided.
+    """
+    summary = incident_summary(incident)
+    description = incident_description(incident, decision)
+    text = {
+        "create_jira_issue": {"summary": summary, "description": description},
+        "send_slack_alert": {"message": f"{summary} on {incident.service} ({incident.region})"},
+        "create_pagerduty_incident": {"title": summary, "description": description},
+    }
+    return [
+        {
+            **step,
+            "arguments": {
+                name: text.get(step["tool"], {}).get(name, value) for name, value in step["arguments"].items()
+            },
+        }
+        for step in plan
+    ]
+
+
+@dataclass(frozen=True)
+class PolicyRule:
+    """A clear-cut case from the SRE guidelines.
+
+    A rule matches when the incident severity is in ``severities`` (any
+    severity if empty) and every IncidentContext flag in ``conditions`` has
+    the given value. Jira and Slack always fire; ``page`` adds PagerDuty.
+    """
+    name: str
+    reasoning: str
+    severities: FrozenSet[IncidentSeverity] = frozenset()
+    conditions: Dict[str, bool] = field(default_factory=dict)
+    page: bool = False
+
+    def matches(self, incident: Incident, context: IncidentContext) -> bool:
+        if self.severities and incident.severity not in self.severities:
+            return False
+        return all(getattr(context, flag) == value for flag, value in self.conditions.items())
+
+
+# First match wins. Anything not covered here is ambiguous and goes to the LLM.
+DEFAULT_RULES = [
+    PolicyRule(
+        name="critical-customer-revenue-outage",
+        reasoning="Critical, customer-facing and revenue-impacting: always page the on-call engineer.",
+        severities=frozenset({IncidentSeverity.CRITICAL}),
+        conditions={"customer_facing": True, "revenue_impacting": True},
+        page=True,
+    ),
+    PolicyRule(
+        name="internal-off-hours",
+        reasoning="Internal-only issue outside business hours: track and notify, never page.",
+        conditions={"customer_facing": False, "revenue_impacting": False, "business_hours": False},
+    ),
+    PolicyRule(
+        name="internal-low-impact",
+        reasoning="Internal-only, no revenue impact and not high severity: can wait for the team.",
+        severities=frozenset({IncidentSeverity.MEDIUM, IncidentSeverity.LOW}),
+        conditions={"customer_facing": False, "revenue_impacting": False},
+    ),
+    PolicyRule(
+        name="low-severity-no-revenue",
+        reasoning="Low severity without revenue impact: track and notify, no page.",
+        severities=frozenset({IncidentSeverity.LOW}),
+        conditions={"revenue_impacting": False},
+    ),
+]
+
+
+@dataclass
+class PolicyDecision:
+    rule: str
+    reasoning: str
+    plan: List[Dict[str, Any]]
+
+
+class DecisionPolicy:
+    """Deterministic rule engine evaluated before the LLM agent loop."""
+
+    def __init__(self, rules: Optional[List[PolicyRule]] = None):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+
+    def evaluate(self, incident: Incident, context: IncidentContext) -> Optional[PolicyDecision]:
+        """Return a tool plan for a clear-cut incident, or None if ambiguous."""
+        for rule in self.rules:
+            if rule.matches(incident, context):
+                return PolicyDecision(
+                    rule=rule.name,
+                    reasoning=f"Policy rule '{rule.name}': {rule.reasoning}",
+                    plan=self._build_plan(rule, incident),
+                )
+        return None
+
+    def _build_plan(self, rule: PolicyRule, incident: Incident) -> List[Dict[str, Any]]:
+        severity = incident.severity
+        summary = incident_summary(incident)
+        description = incident_description(incident, rule.reasoning)
+
+        plan = [
+            {
+                "tool": "create_jira_issue",
+                "arguments": {
+                    "project": POLICY_JIRA_PROJECT,
+                    "summary": summary,
+                    "description": description,
+                    "priority": JIRA_PRIORITY[severity],
+                },
+            },
+            {
+                "tool": "send_slack_alert",
+                "arguments": {
+                    "channel": SLACK_CHANNEL[severity],
+                    "severity": severity.value,
+                    "message": f"{summary} on {incident.service} ({incident.region})",
+                },
+            },
+        ]
+        if rule.page:
+            plan.append({
+                "tool": "create_pagerduty_incident",
+                "arguments": {
+                    "title": summary,
+                    "description": description,
+                    "urgency": "high",
+                    "service_id": incident.service,
+                },
+            })
+        return plan
+
+
+@dataclass(frozen=True)
+class CompletionPolicy:
+    """Which tools must have succeeded before the agent loop can stop.
+
+    Incidents with customer or revenue impact may warrant a page, so they
+    also require PagerDuty: the loop only ends early there once the model
+    has paged, and otherwise runs until the model stops on its own.
+    Internal incidents are done once Jira and Slack are.
+    """
+    base_tools: FrozenSet[str] = frozenset({"create_jira_issue", "send_slack_alert"})
+    page_tools: FrozenSet[str] = frozenset({"create_pagerduty_incident"})
+
+    def required_tools(self, incident: Incident, context: IncidentContext) -> FrozenSet[str]:
+        if context.customer_facing or context.revenue_impacting:
+            return self.base_tools | self.page_tools
+        return self.base_tools
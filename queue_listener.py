@@ -1,66 +1,683 @@
 import sqlite3
 import asyncio
 import json
+import os
+import random
+import socket
+import time
+from dataclasses import asdict, fields, is_dataclass
+from datetime import datetime
 
-from main import main as run_main  # Import your existing async main()
+from models import Incident, IncidentContext, IncidentSeverity, IncidentStatus
+from incident_management_orchestrator import IncidentManagementSystem
 
 DB_PATH = r"Y:\incident_iq\database\data\incident_iq.db"
-POLL_INTERVAL = 5  # seconds between checks
+POLL_INTERVAL = 5  # maximum seconds between checks when the queue is idle
+MIN_POLL_INTERVAL = 0.1  # first idle back-off step, doubled up to POLL_INTERVAL
+WAKEUP_CHECK_INTERVAL = 0.02  # how often the idle wait peeks at PRAGMA data_version
+USE_DATA_VERSION_WAKEUP = True  # wake as soon as another connection commits
+LEASE_RECOVERY_INTERVAL = 30  # seconds between expired-lease sweeps
+BUSY_TIMEOUT_MS = 5000  # wait this long for another worker's write lock
+RETENTION_SECONDS = 24 * 3600  # keep processed rows in the hot table this long
+COMPACTION_INTERVAL = 300  # seconds between retention runs
+COMPACTION_BATCH_SIZE = 500  # rows moved per transaction, keeps write locks short
+ARCHIVE_PROCESSED = True  # copy processed rows to queue_archive instead of just deleting
+MAX_ATTEMPTS = 5  # deliveries before a message is moved to the dead-letter table
+RETRY_BASE_DELAY = 5  # seconds before the first retry, doubled per attempt
+RETRY_MAX_DELAY = 600  # upper bound on the retry delay
+MAX_CONCURRENCY = 6  # messages a worker processes at once
+# Per-severity caps; lower classes can never take the reserved critical slots.
+SEVERITY_CONCURRENCY = {"critical": 6, "high": 4, "medium": 3, "low": 2}
+CRITICAL_RESERVED_SLOTS = 2
+# Scheduling order: a message is treated as if it arrived this many seconds
+# later per severity level below critical, so old LOW work still gets served.
+PRIORITY_AGING_SECONDS = 120
+SEVERITY_RANKS = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+LEASE_SECONDS = 300  # how long a claimed message stays owned by one worker
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
 
+# Columns the listener needs on top of the base queue table.
+QUEUE_COLUMNS = {
+    "worker_id": "TEXT",
+    "lease_expires_at": "TIMESTAMP",
+    "result": "TEXT",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "next_attempt_at": "TIMESTAMP",
+    "last_error": "TEXT",
+    # Set once per row (insert trigger / startup backfill) so claims never parse JSON.
+    "severity_class": "TEXT",
+}
 
-def get_pending_message(conn):
-    print("Fetch a pending message from the queue (FIFO order).")
+
+class InvalidMessageError(ValueError):
+    """Payload can never be processed; retrying it would not help."""
+
+
+def open_connection(db_path=DB_PATH):
+    """Open a queue connection in autocommit mode with WAL and a busy timeout."""
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row
+    # WAL lets pollers read while another worker holds the write lock.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT_MS)}")
+    return conn
+
+
+def ensure_schema(conn):
+    """Create the queue tables and the indexes the listener's queries rely on."""
     cursor = conn.cursor()
     cursor.execute("""
-        SELECT id, data FROM queue
-        WHERE status = 'pending'
-        ORDER BY created_at ASC
-        LIMIT 1
+        CREATE TABLE IF NOT EXISTS queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP
+        )
+    """)
+    ensure_queue_columns(conn)
+    ensure_severity_class(conn)
+
+    # Partial indexes stay as small as the set of rows they cover, so the
+    # claim query costs the same with 100 or 10 million processed rows.
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_queue_pending_created
+        ON queue (created_at, id) WHERE status = 'pending'
+    """)
+    # Per-class claim reads only the LIMIT oldest pending rows of each class.
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_queue_pending_class
+        ON queue (severity_class, created_at, id) WHERE status = 'pending'
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_queue_in_progress_lease
+        ON queue (lease_expires_at) WHERE status = 'in_progress'
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_queue_processed_at
+        ON queue (processed_at) WHERE status = 'processed'
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS queue_archive (
+            id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL,
+            status TEXT,
+            created_at TIMESTAMP,
+            processed_at TIMESTAMP,
+            result TEXT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
     """)
-    row = cursor.fetchone()
-    if row:
-        return {"id": row[0], "data": json.loads(row[1])}
-    return None
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS queue_dead_letter (
+            id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL,
+            created_at TIMESTAMP,
+            attempts INTEGER,
+            last_error TEXT,
+            failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def ensure_queue_columns(conn):
+    """Add the worker/lease/result columns to the queue table if they are missing."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(queue)")
+    existing = {row[1] for row in cursor.fetchall()}
+    for column, column_type in QUEUE_COLUMNS.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE queue ADD COLUMN {column} {column_type}")
+    conn.commit()
+
+
+# Severity class of a queued payload ({data} is its column); anything
+# unknown or unparsable is "low".
+SEVERITY_CLASS_SQL = """
+    CASE CASE WHEN json_valid({data}) THEN lower(coalesce(
+        json_extract({data}, '$.incident.severity'),
+        json_extract({data}, '$.severity')
+    )) END
+        WHEN 'critical' THEN 'critical'
+        WHEN 'high' THEN 'high'
+        WHEN 'medium' THEN 'medium'
+        ELSE 'low'
+    END
+"""
+
+
+def ensure_severity_class(conn):
+    """Classify each row once: on insert by trigger, plus a backfill of older rows."""
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_queue_severity_class
+        AFTER INSERT ON queue
+        WHEN NEW.severity_class IS NULL
+        BEGIN
+            UPDATE queue SET severity_class = {SEVERITY_CLASS_SQL.format(data="NEW.data")}
+            WHERE id = NEW.id;
+        END
+    """)
+    # Rows enqueued (or claimed) before the column existed.
+    cursor.execute(f"""
+        UPDATE queue SET severity_class = {SEVERITY_CLASS_SQL.format(data="data")}
+        WHERE severity_class IS NULL AND status IN ('pending', 'in_progress')
+    """)
+    conn.commit()
+
+
+def _free_non_critical(in_flight):
+    busy = sum(count for cls, count in in_flight.items() if cls != "critical")
+    return MAX_CONCURRENCY - CRITICAL_RESERVED_SLOTS - busy
+
+
+def available_slots(in_flight):
+    """How many more messages of each severity class this worker may start."""
+    free_total = MAX_CONCURRENCY - sum(in_flight.values())
+    free_non_critical = _free_non_critical(in_flight)
+
+    slots = {}
+    for cls, limit in SEVERITY_CONCURRENCY.items():
+        free = min(limit - in_flight.get(cls, 0), free_total)
+        if cls != "critical":
+            free = min(free, free_non_critical)
+        slots[cls] = max(free, 0)
+    return slots
+
+
+def claim_messages(conn, worker_id, in_flight, lease_seconds=LEASE_SECONDS):
+    """Atomically claim due pending messages, highest effective priority first.
+
+    ``in_flight`` maps severity class to the number of messages this worker
+    is already processing; only as many messages are claimed as the
+    concurrency limits leave room for (see ``available_slots``). Priority is severity with aging: each
+    severity level below critical counts as PRIORITY_AGING_SECONDS of extra
+    queueing time. Each class with free slots reads only its oldest due rows
+    (LIMIT slots) from ``idx_queue_pending_class``, so a claim costs the
+    same with a backlog of ten or a hundred thousand. The selection and the UPDATE ... RETURNING run inside one
+    IMMEDIATE transaction, so two watchers can never receive the same row.
+    Messages waiting for a retry are skipped until their ``next_attempt_at``;
+    every claim counts as a delivery attempt.
+    """
+    slots = available_slots(in_flight)
+    total = MAX_CONCURRENCY - sum(in_flight.values())
+    if not any(slots.values()):
+        return []
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        candidates = []
+        for cls, limit in slots.items():
+            if limit <= 0:
+                continue
+            cursor.execute("""
+                SELECT id, julianday(created_at) * 86400 + ? AS priority
+                FROM queue
+                WHERE status = 'pending' AND severity_class = ?
+                  AND (next_attempt_at IS NULL OR next_attempt_at <= CURRENT_TIMESTAMP)
+                ORDER BY created_at, id
+                LIMIT ?
+            """, (SEVERITY_RANKS[cls] * PRIORITY_AGING_SECONDS, cls, limit))
+            candidates += [(row[1], row[0], cls) for row in cursor.fetchall()]
+        candidates.sort()
+
+        # Per-class caps are applied by the LIMITs; the shared non-critical
+        # budget still has to be respected across classes.
+        non_critical_budget = _free_non_critical(in_flight)
+        selected = []
+        for _, message_id, cls in candidates:
+            if len(selected) >= total:
+                break
+            if cls != "critical":
+                if non_critical_budget <= 0:
+                    continue
+                non_critical_budget -= 1
+            selected.append((message_id, cls))
+
+        rows = []
+        if selected:
+            placeholders = ", ".join("?" * len(selected))
+            cursor.execute(f"""
+                UPDATE queue
+                SET status = 'in_progress',
+                    worker_id = ?,
+                    lease_expires_at = datetime(CURRENT_TIMESTAMP, ?),
+                    attempts = attempts + 1
+                WHERE id IN ({placeholders})
+                RETURNING id, data, attempts
+            """, (worker_id, f"+{int(lease_seconds)} seconds", *[message_id for message_id, _ in selected]))
+            rows = cursor.fetchall()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # RETURNING does not preserve the selection order.
+    order = {message_id: (position, cls) for position, (message_id, cls) in enumerate(selected)}
+    rows.sort(key=lambda row: order[row[0]][0])
+    return [
+        {"id": row[0], "raw": row[1], "attempts": row[2], "severity_class": order[row[0]][1]}
+        for row in rows
+    ]
+
+
+def recover_expired_leases(conn, max_attempts=MAX_ATTEMPTS):
+    """Return messages whose lease expired (crashed/stuck worker) to the queue.
+
+    A message that keeps taking its worker down has used up its attempts by
+    then and goes to the dead-letter table instead.
+    """
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            SELECT id FROM queue
+            WHERE status = 'in_progress'
+              AND lease_expires_at < CURRENT_TIMESTAMP
+              AND attempts >= ?
+        """, (max_attempts,))
+        exhausted = [row[0] for row in cursor.fetchall()]
+        for message_id in exhausted:
+            _move_to_dead_letter(cursor, message_id, "Lease expired on final attempt")
+
+        cursor.execute("""
+            UPDATE queue
+            SET status = 'pending',
+                worker_id = NULL,
+                lease_expires_at = NULL
+            WHERE status = 'in_progress'
+              AND lease_expires_at < CURRENT_TIMESTAMP
+        """)
+        recovered = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if recovered:
+        print(f"♻️  Recovered {recovered} message(s) with expired leases")
+    if exhausted:
+        print(f"☠️  Dead-lettered {len(exhausted)} message(s) whose final lease expired")
+    return recovered
+
+
+def _move_to_dead_letter(cursor, message_id, error):
+    cursor.execute("""
+        INSERT OR REPLACE INTO queue_dead_letter (id, data, created_at, attempts, last_error)
+        SELECT id, data, created_at, attempts, ?
+        FROM queue WHERE id = ?
+    """, (error, message_id))
+    cursor.execute("DELETE FROM queue WHERE id = ?", (message_id,))
 
 
-def mark_message_processed(conn, message_id):
-    """Mark message as processed."""
+def retry_delay(attempts, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Exponential back-off with jitter: half the window fixed, half random."""
+    window = min(cap, base * 2 ** max(attempts - 1, 0))
+    return window / 2 + random.uniform(0, window / 2)
+
+
+def fail_message(conn, message, worker_id, error, max_attempts=MAX_ATTEMPTS):
+    """Schedule a retry for a failed message, or dead-letter it.
+
+    Invalid payloads and messages that have used all their attempts go
+    straight to ``queue_dead_letter`` so they can never block the queue.
+    """
+    error_text = f"{type(error).__name__}: {error}"
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(
+            "SELECT 1 FROM queue WHERE id = ? AND worker_id = ? AND status = 'in_progress'",
+            (message["id"], worker_id),
+        )
+        if cursor.fetchone() is None:
+            conn.commit()
+            print(f"⚠️  Lease on message {message['id']} was lost before the failure was recorded")
+            return
+
+        if isinstance(error, InvalidMessageError) or message["attempts"] >= max_attempts:
+            _move_to_dead_letter(cursor, message["id"], error_text)
+            conn.commit()
+            print(f"☠️  Message {message['id']} dead-lettered after {message['attempts']} attempt(s): {error_text}")
+            return
+
+        delay = retry_delay(message["attempts"])
+        cursor.execute("""
+            UPDATE queue
+            SET status = 'pending',
+                worker_id = NULL,
+                lease_expires_at = NULL,
+                next_attempt_at = datetime(CURRENT_TIMESTAMP, ?),
+                last_error = ?
+            WHERE id = ?
+        """, (f"+{delay:.3f} seconds", error_text, message["id"]))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    print(f"🔁 Message {message['id']} failed (attempt {message['attempts']}/{max_attempts}), retrying in {delay:.1f}s: {error_text}")
+
+
+def renew_lease(conn, message_id, worker_id, lease_seconds=LEASE_SECONDS):
+    """Extend this worker's lease on a message; returns False if it was lost."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE queue
+        SET lease_expires_at = datetime(CURRENT_TIMESTAMP, ?)
+        WHERE id = ?
+          AND worker_id = ?
+          AND status = 'in_progress'
+    """, (f"+{int(lease_seconds)} seconds", message_id, worker_id))
+    conn.commit()
+    return cursor.rowcount == 1
+
+
+def _json_default(value):
+    # Tickets and other dataclasses in the result stay parseable as objects
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    return str(value)
+
+
+def mark_message_processed(conn, message_id, worker_id, result=None):
+    """Mark message as processed and store its result, provided this worker still holds its lease."""
     cursor = conn.cursor()
     cursor.execute("""
         UPDATE queue
         SET status = 'processed',
-            processed_at = CURRENT_TIMESTAMP
+            processed_at = CURRENT_TIMESTAMP,
+            lease_expires_at = NULL,
+            result = ?
         WHERE id = ?
-    """, (message_id,))
+          AND worker_id = ?
+          AND status = 'in_progress'
+    """, (json.dumps(result, default=_json_default), message_id, worker_id))
     conn.commit()
+    if not cursor.rowcount:
+        print(f"⚠️  Lease on message {message_id} was lost before it was acknowledged")
 
 
-async def handle_message(message):
-    """Handle a message by triggering the incident system."""
-    print(f"\n📬 Consumed message: {message['id']}")
-    print(f"🧩 Payload: {json.dumps(message['data'], indent=2)}")
+def compact_processed(conn, retention_seconds=RETENTION_SECONDS,
+                      batch_size=COMPACTION_BATCH_SIZE, archive=ARCHIVE_PROCESSED):
+    """Move (or delete) one batch of processed rows older than the retention window.
 
-    # Trigger your existing async main() from main.py
-    await run_main()
+    Returns the number of rows removed from the queue table.
+    """
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            SELECT id FROM queue
+            WHERE status = 'processed'
+              AND processed_at < datetime(CURRENT_TIMESTAMP, ?)
+            ORDER BY processed_at
+            LIMIT ?
+        """, (f"-{int(retention_seconds)} seconds", batch_size))
+        ids = [row[0] for row in cursor.fetchall()]
+        if ids:
+            placeholders = ", ".join("?" * len(ids))
+            if archive:
+                cursor.execute(f"""
+                    INSERT OR REPLACE INTO queue_archive (id, data, status, created_at, processed_at, result)
+                    SELECT id, data, status, created_at, processed_at, result
+                    FROM queue WHERE id IN ({placeholders})
+                """, ids)
+            cursor.execute(f"DELETE FROM queue WHERE id IN ({placeholders})", ids)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(ids)
 
-    print("✅ Incident processing completed for this message.\n")
 
+async def retention_job(db_path=DB_PATH, interval=COMPACTION_INTERVAL):
+    """Background task that keeps the hot queue table bounded."""
+    conn = open_connection(db_path)
+    try:
+        while True:
+            total = 0
+            try:
+                while True:
+                    removed = compact_processed(conn)
+                    total += removed
+                    if removed < COMPACTION_BATCH_SIZE:
+                        break
+                    # Yield between batches so claims and acks get the write lock.
+                    await asyncio.sleep(0.05)
+            except Exception as e:
+                # e.g. "database is locked" during a write storm: retry next run
+                print(f"⚠️  Queue compaction failed, retrying in {interval}s: {e}")
+            if total:
+                action = "Archived" if ARCHIVE_PROCESSED else "Deleted"
+                print(f"🧹 {action} {total} processed message(s) older than {RETENTION_SECONDS}s")
+            await asyncio.sleep(interval)
+    finally:
+        conn.close()
 
-async def watch_queue():
-    """Continuously poll the queue for new messages."""
-    print("🚀 Queue watcher started. Waiting for messages...\n")
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
 
+class QueueWakeup:
+    """Idle wait that returns early when another connection writes to the DB.
+
+    ``PRAGMA data_version`` changes whenever a *different* connection (any
+    process) commits, so a producer enqueuing an incident wakes the watcher
+    within ``WAKEUP_CHECK_INTERVAL`` instead of after a full poll interval.
+    Reading it touches no table, so checking it often is cheap. ``notify()``
+    wakes the wait from inside the process (e.g. a worker slot was freed).
+    """
+
+    def __init__(self, conn, enabled=USE_DATA_VERSION_WAKEUP, check_interval=WAKEUP_CHECK_INTERVAL):
+        self.conn = conn
+        self.enabled = enabled
+        self.check_interval = check_interval
+        self._last_version = self._data_version() if enabled else None
+        self._notified = asyncio.Event()
+
+    def _data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def notify(self):
+        self._notified.set()
+
+    async def wait(self, timeout):
+        """Sleep up to ``timeout`` seconds; return True if woken early."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._notified.is_set():
+                self._notified.clear()
+                return True
+            if self.enabled:
+                version = self._data_version()
+                if version != self._last_version:
+                    self._last_version = version
+                    return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            step = min(self.check_interval, remaining) if self.enabled else remaining
+            try:
+                await asyncio.wait_for(self._notified.wait(), step)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _time_context(now=None):
+    """Business-hours/peak/weekend flags for payloads that do not provide them."""
+    now = now or datetime.now()
+    return {
+        "business_hours": 9 <= now.hour < 18,
+        "peak_traffic_hours": (10 <= now.hour < 14) or (18 <= now.hour < 21),
+        "weekend": now.weekday() >= 5,
+    }
+
+
+def decode_incident(data):
+    """Decode a queue payload into an (Incident, IncidentContext) pair.
+
+    Accepts either ``{"incident": {...}, "context": {...}}`` or the incident
+    fields at the top level with an optional ``"context"`` object. Raises
+    ValueError when required incident fields are missing or invalid.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Queue payload must be a JSON object, got {type(data).__name__}")
+
+    incident_data = data.get("incident", data)
+    if not isinstance(incident_data, dict):
+        raise ValueError(f"Queue payload incident must be a JSON object, got {type(incident_data).__name__}")
+    incident_data = dict(incident_data)
+    context_data = data.get("context") or incident_data.pop("context", None) or {}
+    if not isinstance(context_data, dict):
+        raise ValueError(f"Queue payload context must be a JSON object, got {type(context_data).__name__}")
+
+    missing = [key for key in ("id", "title", "severity", "service") if not incident_data.get(key)]
+    if missing:
+        raise ValueError(f"Queue payload is missing incident field(s): {', '.join(missing)}")
+
+    description = incident_data.get("description") or incident_data.get("incident_text") or incident_data["title"]
+    incident = Incident(
+        id=str(incident_data["id"]),
+        title=incident_data["title"],
+        description=description,
+        severity=IncidentSeverity(str(incident_data["severity"]).lower()),
+        status=IncidentStatus(str(incident_data.get("status", IncidentStatus.DETECTED.value)).lower()),
+        detected_at=incident_data.get("detected_at") or datetime.now().isoformat(),
+        service=incident_data["service"],
+        metrics=incident_data.get("metrics") or {},
+        logs=list(incident_data.get("logs") or []),
+        affected_components=list(incident_data.get("affected_components") or [incident_data["service"]]),
+        region=incident_data.get("region", "unknown"),
+        incident_text=incident_data.get("incident_text") or description,
+        corrective_actions=list(incident_data.get("corrective_actions") or []),
+        root_cause=incident_data.get("root_cause"),
+        resolution=incident_data.get("resolution"),
+    )
+
+    flags = {**_time_context(), "customer_facing": False, "revenue_impacting": False}
+    for f in fields(IncidentContext):
+        if f.name in context_data:
+            # bool("false") is True: only real JSON booleans are accepted
+            if not isinstance(context_data[f.name], bool):
+                raise ValueError(f"Context flag {f.name} must be true or false, got {context_data[f.name]!r}")
+            flags[f.name] = context_data[f.name]
+    context = IncidentContext(**flags)
+
+    return incident, context
+
+
+async def handle_message(ims, message):
+    """Decode a message and run it through the worker's incident system.
+
+    Raises InvalidMessageError for payloads that can never succeed and
+    RuntimeError when the incident system reports a failure.
+    """
+    print(f"\n📬 Consumed message: {message['id']} (attempt {message['attempts']})")
+    try:
+        data = json.loads(message["raw"])
+        print(f"🧩 Payload: {json.dumps(data, indent=2)}")
+        incident, context = decode_incident(data)
+    except (TypeError, ValueError) as e:
+        raise InvalidMessageError(str(e)) from e
+
+    result = await ims.process_incident(incident, context)
+    if result.get("status") == "error":
+        ims.forget_incident(incident.id)
+        raise RuntimeError(result.get("message", "incident processing failed"))
+
+    # The worker lives for many messages; the result is persisted to the
+    # queue row, so don't keep per-incident state around in memory.
+    ims.forget_incident(incident.id)
+
+    print("✅ Incident processing completed for this message.\n")
+    return result
+
+
+async def _keep_lease(conn, message_id, worker_id):
+    """Heartbeat that renews a message's lease while its handler runs."""
     while True:
-        message = get_pending_message(conn)
-        if message:
-            await handle_message(message)
-            mark_message_processed(conn, message["id"])
-        else:
-            print("⏳ No messages in queue. Checking again soon...")
-        await asyncio.sleep(POLL_INTERVAL)
+        await asyncio.sleep(LEASE_SECONDS / 3)
+        if not renew_lease(conn, message_id, worker_id):
+            print(f"⚠️  Lease on message {message_id} lost while it was being processed")
+            return
+
+
+async def process_message(conn, ims, message, worker_id):
+    """Handle one claimed message and acknowledge or fail it."""
+    heartbeat = asyncio.create_task(_keep_lease(conn, message["id"], worker_id))
+    try:
+        result = await handle_message(ims, message)
+    except Exception as e:
+        # One bad message must never stop the watcher.
+        fail_message(conn, message, worker_id, e)
+    else:
+        mark_message_processed(conn, message["id"], worker_id, result)
+    finally:
+        heartbeat.cancel()
+
+
+def _report_retention_exit(task):
+    if task.cancelled():
+        return
+    error = task.exception()
+    print(f"❌ Queue retention job stopped unexpectedly: {error!r} - processed rows will accumulate")
+
+
+async def watch_queue(worker_id=WORKER_ID):
+    """Continuously claim messages by priority and process them concurrently."""
+    print(f"🚀 Queue watcher {worker_id} started. Waiting for messages...\n")
+    conn = open_connection(DB_PATH)
+    ensure_schema(conn)
+    wakeup = QueueWakeup(conn)
+    retention_task = asyncio.create_task(retention_job(DB_PATH))
+    retention_task.add_done_callback(_report_retention_exit)
+
+    # One incident system (LLM clients, agents) per worker, reused for every message.
+    ims = IncidentManagementSystem()
+    await ims.initialize()
+
+    in_flight = {cls: 0 for cls in SEVERITY_CONCURRENCY}
+    tasks = set()
+
+    def on_done(task, cls):
+        tasks.discard(task)
+        in_flight[cls] -= 1
+        wakeup.notify()
+
+    idle_delay = MIN_POLL_INTERVAL
+    next_recovery = 0.0
+    try:
+        while True:
+            if time.monotonic() >= next_recovery:
+                recover_expired_leases(conn)
+                next_recovery = time.monotonic() + LEASE_RECOVERY_INTERVAL
+
+            messages = claim_messages(conn, worker_id, in_flight)
+            if messages:
+                idle_delay = MIN_POLL_INTERVAL
+                print(f"📦 Claimed {len(messages)} message(s): "
+                      f"{', '.join(m['severity_class'] for m in messages)}")
+                for message in messages:
+                    cls = message["severity_class"]
+                    in_flight[cls] += 1
+                    task = asyncio.create_task(process_message(conn, ims, message, worker_id))
+                    tasks.add(task)
+                    task.add_done_callback(lambda t, cls=cls: on_done(t, cls))
+                # Work exists: keep claiming until the slots are full.
+                continue
 
+            if idle_delay == MIN_POLL_INTERVAL and not tasks:
+                print("⏳ No messages in queue. Waiting for new work...")
+            # Woken early by new rows (other connections) or a freed slot.
+            woke = await wakeup.wait(idle_delay)
+            idle_delay = MIN_POLL_INTERVAL if woke else min(idle_delay * 2, POLL_INTERVAL)
+    finally:
+        retention_task.cancel()
+        for task in tasks:
+            task.cancel()
+        await ims.shutdown()
+        conn.close()
 
 if __name__ == "__main__":
     asyncio.run(watch_queue())
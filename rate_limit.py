@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+OVERLOAD_STATUS_CODES = (429, 503)
+
+
+def is_overload(error: BaseException) -> bool:
+    """Timeouts and 429/503 responses mean the backend is saturated."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status in OVERLOAD_STATUS_CODES:
+        return True
+    # httpx.ReadTimeout, openai.APITimeoutError, ... without importing each SDK
+    return "Timeout" in type(error).__name__
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent LLM calls to one backend.
+
+    Each success adds ``1 / limit`` (about +1 per window of ``limit``
+    calls); an overload (timeout, 429, 503) multiplies the limit by
+    ``decrease_factor``, at most once per ``decrease_cooldown`` so one burst
+    of failures only halves it once. Callers beyond the limit wait in FIFO
+    order and their queueing delay is recorded.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 1.0,
+        window: int = 500
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.in_flight = 0
+        self.overloads = 0
+        self._last_decrease = 0.0
+        self._queue_delays: Deque[float] = deque(maxlen=window)
+        self._condition = asyncio.Condition()
+        self._waiting = 0
+
+    async def acquire(self):
+        started = time.monotonic()
+        async with self._condition:
+            self._waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            finally:
+                self._waiting -= 1
+            self.in_flight += 1
+        self._queue_delays.append(time.monotonic() - started)
+
+    async def release(self, outcome: str):
+        """``outcome`` is "success", "overload" or "ignore" (e.g. a cancelled hedge)."""
+        async with self._condition:
+            self.in_flight -= 1
+            if outcome == "success":
+                self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+            elif outcome == "overload":
+                self.overloads += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self._last_decrease = now
+                    self.limit = max(self.limit * self.decrease_factor, self.min_limit)
+                    print(f"🐢 LLM concurrency limit cut to {int(self.limit)} after overload")
+            self._condition.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        delays = list(self._queue_delays)
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": self._waiting,
+            "overloads": self.overloads,
+            "avg_queue_delay_s": round(sum(delays) / len(delays), 3) if delays else 0.0,
+            "max_queue_delay_s": round(max(delays), 3) if delays else 0.0,
+        }
+
+
+class TokenBucket:
+    """Tokens-per-minute budget for one backend.
+
+    ``acquire(n)`` waits until ``n`` tokens (capped at the bucket size) are
+    available and takes them; ``adjust(delta)`` settles the difference once
+    the real usage of a call is known, and may leave the bucket in debt.
+    """
+
+    def __init__(self, tokens_per_minute: int, burst: Optional[int] = None):
+        self.tokens_per_minute = tokens_per_minute
+        self.capacity = burst or tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = float(self.capacity)
+        self.throttled_seconds = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: int):
+        tokens = min(tokens, self.capacity)
+        async with self._lock:  # FIFO: one waiter at a time drains the bucket
+            self._refill()
+            if self.tokens < tokens:
+                wait = (tokens - self.tokens) / self.rate
+                self.throttled_seconds += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self.tokens -= tokens
+
+    def adjust(self, delta: int):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+    def metrics(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_available": int(self.tokens),
+            "throttled_s": round(self.throttled_seconds, 3),
+        }
+
+
+def token_bucket_from_env(backend: str) -> Optional[TokenBucket]:
+    """TokenBucket from LLM_<BACKEND>_TPM, or None (unlimited) if unset."""
+    value = os.getenv(f"LLM_{backend.upper()}_TPM")
+    return TokenBucket(int(value)) if value else None
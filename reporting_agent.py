@@ -2,6 +2,7 @@ from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage
 from datetime import datetime
 from models import Incident, IncidentReport
+from http_clients import ollama_client_kwargs
 import json
 
 class ReportingAgent:
@@ -11,7 +12,8 @@ class ReportingAgent:
         self.llm = ChatOllama(
             model="llama3.2",
             base_url="http://localhost:11434",
-            temperature=0.7
+            temperature=0.7,
+            async_client_kwargs=ollama_client_kwargs()
         )
 
     def generate_report(self, incident: Incident) -> IncidentReport:
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose breaker is open."""
+
+
+class BulkheadFullError(Exception):
+    """Raised when a tool's concurrency pool and wait queue are exhausted."""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling window of outcomes.
+
+    Opens when at least ``min_calls`` calls in the last ``window_seconds``
+    failed at a rate of ``failure_threshold`` or more. After
+    ``open_seconds`` it lets ``half_open_calls`` trial calls through: a
+    success closes it again, a failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        failure_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._trials = 0
+
+    def _trim(self, now: float):
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def retry_in(self) -> float:
+        return max(self.opened_at + self.open_seconds - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        if self.state == OPEN and self.retry_in() == 0.0:
+            self.state = HALF_OPEN
+            self._trials = 0
+            print(f"🟡 Circuit for {self.name} half-open - sending a trial call")
+        if self.state == HALF_OPEN:
+            if self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+        elif self.state == CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def abandon(self):
+        """A call allowed through never reached the backend (or was cancelled)."""
+        if self.state == HALF_OPEN and self._trials > 0:
+            self._trials -= 1
+
+    def record(self, ok: bool):
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            if ok:
+                self.state = CLOSED
+                self._outcomes.clear()
+                print(f"🟢 Circuit for {self.name} closed")
+            else:
+                self._open(now)
+            return
+
+        self._outcomes.append((now, ok))
+        self._trim(now)
+        failures = sum(1 for _, success in self._outcomes if not success)
+        if (
+            self.state == CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_threshold
+        ):
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        print(f"🔴 Circuit for {self.name} opened - failing fast for {self.open_seconds:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        self._trim(time.monotonic())
+        return {
+            "state": self.state,
+            "window_calls": len(self._outcomes),
+            "window_failures": sum(1 for _, ok in self._outcomes if not ok),
+            "rejected": self.rejected,
+        }
+
+
+class Bulkhead:
+    """At most ``max_concurrent`` calls in flight; waiting is bounded in count and time."""
+
+    def __init__(self, name: str, max_concurrent: int = 8, max_waiting: int = 32, max_wait: float = 10.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+        self._in_flight = 0
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        if self._waiting >= self.max_waiting:
+            self.rejected += 1
+            raise BulkheadFullError(f"{self.name} has {self._waiting} calls waiting - backend saturated")
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise BulkheadFullError(
+                f"{self.name} had no free slot within {self.max_wait}s - backend saturated"
+            ) from None
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        try:
+            return await call()
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "max_concurrent": self.max_concurrent,
+            "rejected": self.rejected,
+        }
+
+
+class ToolGuard:
+    """Circuit breaker + bulkhead for one downstream tool backend."""
+
+    def __init__(self, name: str, breaker: Optional[CircuitBreaker] = None, bulkhead: Optional[Bulkhead] = None):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker(name)
+        self.bulkhead = bulkhead or Bulkhead(name)
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"{self.name} backend unavailable (circuit open, retry in {self.breaker.retry_in():.0f}s) - "
+                "continue with the other tools"
+            )
+        try:
+            result = await self.bulkhead.run(call)
+        except (BulkheadFullError, asyncio.CancelledError):
+            # Local back-pressure or cancellation says nothing about the backend
+            self.breaker.abandon()
+            raise
+        except Exception:
+            self.breaker.record(False)
+            raise
+        self.breaker.record(True)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.breaker.stats(), **{f"bulkhead_{k}": v for k, v in self.bulkhead.stats().items()}}
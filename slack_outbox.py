@@ -0,0 +1,156 @@
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_DIGEST_WINDOW = 60.0
+IMMEDIATE_SEVERITIES = frozenset({"critical"})
+SEVERITY_ORDER = ("critical", "high", "medium", "low")
+MAX_LISTED_INCIDENTS = 10
+
+SlackSender = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class _Window:
+    pending: List[Tuple[Dict[str, Any], str]] = field(default_factory=list)
+    timer: Optional[asyncio.Task] = None
+    failing: bool = False  # last send to this channel failed: stop folding
+
+
+class SlackOutbox:
+    """Coalescing outbox in front of ``send_slack_alert``.
+
+    The first alert for a (channel, service) pair and every CRITICAL alert
+    go out immediately. Later alerts for the same pair within ``window``
+    seconds are acknowledged as queued and folded into one digest message
+    with counts, sent when the window closes. A window that collected
+    alerts is followed by another, so a long storm produces one digest per
+    window; a quiet window closes and the next alert is sent straight away.
+
+    A window only opens after a successful send. While sends to the channel
+    are failing, alerts are not folded: each is sent and its real result
+    returned. A failed digest keeps its alerts for the next window.
+    """
+
+    def __init__(
+        self,
+        send: SlackSender,
+        window: float = DEFAULT_DIGEST_WINDOW,
+        immediate_severities: frozenset = IMMEDIATE_SEVERITIES
+    ):
+        self._send = send
+        self.window = window
+        self.immediate_severities = immediate_severities
+        self._windows: Dict[Tuple[str, str], _Window] = {}
+        self.sent_immediately = 0
+        self.coalesced = 0
+        self.digests_sent = 0
+        self.digest_failures = 0
+        self.dropped = 0
+
+    async def send(self, arguments: Dict[str, Any], service: str, incident_id: str) -> Dict[str, Any]:
+        key = (arguments.get("channel", ""), service)
+        severity = str(arguments.get("severity", "")).lower()
+        window = self._windows.get(key)
+
+        if window is not None and not window.failing and severity not in self.immediate_severities:
+            window.pending.append((arguments, incident_id))
+            self.coalesced += 1
+            print(f"📨 Slack alert for {incident_id} folded into the next {key[0]} digest for {service}")
+            return {
+                "status": "success",
+                "channel": key[0],
+                "coalesced": True,
+                "message": f"Queued for the {service} digest on {key[0]} (sent within {self.window:.0f}s)",
+            }
+
+        try:
+            result = await self._send(arguments)
+        except Exception:
+            self._mark_failing(key)
+            raise
+        if result.get("status") == "error":
+            self._mark_failing(key)
+            return result
+
+        self.sent_immediately += 1
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window()
+            window.timer = asyncio.create_task(self._close_window(key))
+        window.failing = False
+        return result
+
+    def _mark_failing(self, key: Tuple[str, str]):
+        window = self._windows.get(key)
+        if window is not None:
+            window.failing = True
+
+    async def _close_window(self, key: Tuple[str, str]):
+        while True:
+            await asyncio.sleep(self.window)
+            window = self._windows.get(key)
+            if window is None:
+                return
+            if not window.pending:
+                del self._windows[key]
+                return
+            await self._send_digest(key, window)
+
+    async def _send_digest(self, key: Tuple[str, str], window: _Window) -> bool:
+        """Send the window's pending alerts as one message; on failure keep them queued."""
+        alerts, window.pending = window.pending, []
+        channel, service = key
+        severities = Counter(str(args.get("severity", "unknown")).lower() for args, _ in alerts)
+        highest = next((s for s in SEVERITY_ORDER if s in severities), "unknown")
+        counts = ", ".join(f"{severity} {count}" for severity, count in severities.most_common())
+        incident_ids = [incident_id for _, incident_id in alerts]
+        listed = ", ".join(incident_ids[:MAX_LISTED_INCIDENTS])
+        if len(incident_ids) > MAX_LISTED_INCIDENTS:
+            listed += f" (+{len(incident_ids) - MAX_LISTED_INCIDENTS} more)"
+
+        message = (
+            f"Digest for {service}: {len(alerts)} more alert(s) in the last {self.window:.0f}s "
+            f"({counts}). Incidents: {listed}. Latest: {alerts[-1][0].get('message', '')}"
+        )
+        try:
+            result = await self._send({"channel": channel, "severity": highest, "message": message})
+            if result.get("status") == "error":
+                raise RuntimeError(result.get("message", "Slack returned an error"))
+        except BaseException as e:
+            window.pending = alerts + window.pending
+            window.failing = True
+            if not isinstance(e, Exception):
+                raise
+            self.digest_failures += 1
+            print(f"❌ Slack digest for {service} on {channel} failed, keeping "
+                  f"{len(alerts)} alert(s) for the next attempt: {e}")
+            return False
+
+        window.failing = False
+        self.digests_sent += 1
+        print(f"📦 Sent {channel} digest for {service} covering {len(alerts)} alert(s)")
+        return True
+
+    async def flush(self):
+        """Send every pending digest now and close all windows (shutdown)."""
+        for key, window in list(self._windows.items()):
+            if window.timer is not None:
+                window.timer.cancel()
+                await asyncio.gather(window.timer, return_exceptions=True)
+            if window.pending and not await self._send_digest(key, window):
+                self.dropped += len(window.pending)
+                print(f"❌ {len(window.pending)} Slack alert(s) for {key[1]} on {key[0]} could not be delivered: "
+                      f"{', '.join(incident_id for _, incident_id in window.pending)}")
+        self._windows.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sent_immediately": self.sent_immediately,
+            "coalesced": self.coalesced,
+            "digests_sent": self.digests_sent,
+            "digest_failures": self.digest_failures,
+            "dropped": self.dropped,
+            "open_windows": len(self._windows),
+        }
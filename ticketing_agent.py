@@ -1,18 +1,31 @@
 from langchain_ollama import ChatOllama
 from langchain_core.tools import tool
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
+from langchain_core.prompts import ChatPromptTemplate
 from datetime import datetime
 from models import Ticket, Incident, IncidentReport, IncidentContext
-from typing import Any, Dict, List
+from decision_cache import DecisionCache, incident_fingerprint
+from policy import CompletionPolicy, DecisionPolicy, with_incident_text
+from ids import new_id
+from idempotency import IdempotencyStore, idempotency_key
+from token_budget import TokenBudget, count_message_tokens
+from http_clients import HTTPClientConfig, ollama_client_kwargs
+from llm_router import LLMBackend, ModelRouter, secondary_llm_from_env
+from model_tiers import DEFAULT_MODEL, ModelTier, TieringPolicy
+from rate_limit import AdaptiveConcurrencyLimiter, token_bucket_from_env
+from resilience import Bulkhead, CircuitBreaker, ToolGuard
+from slack_outbox import SlackOutbox
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
 import json
+import os
+import time
 
-# Import your MCP functions
-from mcps import create_jira_issue as _create_jira
-from mcps import send_slack_alert as _send_slack
-from mcps import create_pagerduty_incident as _create_pd
+from mcp_client import DEFAULT_BATCH_WINDOW, MCPToolClient, ToolBatcher, ToolHandler
 
 
-# Wrap MCP tools as LangChain tools so the LLM can call them
+# LangChain tool definitions give the LLM the tool schemas; the calls it makes
+# are dispatched to the IncidentTools MCP server (see mcp_client.py).
 import sqlite3
 from datetime import datetime
 
@@ -20,7 +33,7 @@ from datetime import datetime
 def create_jira_issue(project: str, summary: str, description: str, priority: str) -> dict:
     """Create a Jira ticket for incident tracking and push to DB."""
 
-    ticket_id = f"INC-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    ticket_id = new_id("INC-")
     print(f"🧰 Creating Jira issue: {ticket_id} | {summary} | Priority: {priority}")
 
     # --- Database Insertion ---
@@ -106,15 +119,143 @@ async def create_pagerduty_incident(title: str, description: str, urgency: str,
     }
 
 
+# Static instructions: sent as the same SystemMessage prefix on every call so
+# Ollama / OpenAI-compatible servers can reuse their cached prompt prefix.
+SYSTEM_PROMPT = """You are an expert incident coordinator with 15+ years of SRE experience.
+
+You have access to tools for managing incidents. Analyze the incident carefully and decide which tools to call.
+
+DECISION GUIDELINES:
+- ALWAYS create a Jira ticket for tracking (choose appropriate priority)
+- Send Slack alerts for team visibility (choose channel based on severity)
+- ONLY create PagerDuty incidents for truly critical issues:
+  * Customer-facing outages affecting many users
+  * Revenue-impacting payment/checkout failures
+  * Security breaches or data loss
+- DO NOT wake engineers for:
+  * Internal tools during off-hours
+  * Issues that can wait until business hours
+  * Potential issues without confirmed customer impact
+
+Think: "Would I want to be woken at 3 AM for this?" If no, don't page.
+
+Questions to consider for every incident:
+1. Would YOU want to be woken up for this at this time?
+2. How many customers are affected RIGHT NOW?
+3. Can this wait until business hours?
+4. Is this causing revenue loss or just potential issues?
+
+Analyze the incident, explain your reasoning, then call the appropriate tools."""
+
+# Per-incident content, the only part that changes between calls.
+INCIDENT_DETAILS = """**Incident Details:**
+- ID: {incident_id}
+- Title: {title}
+- Severity: {severity}
+- Service: {service}
+- Region: {region}
+
+**Context:**
+{context}
+
+**Technical Details:**
+- Error Rate: {error_rate}
+- Metrics: {metrics}
+- Affected Components: {components}
+
+**Recent Logs:**
+{logs}"""
+
+INCIDENT_PROMPT = """ANALYZE THIS INCIDENT:
+
+""" + INCIDENT_DETAILS + """
+
+Think through your decision and call the appropriate tools now."""
+
+# Batch mode: several incidents in one prompt, answered with a JSON plan each
+# instead of tool calls. Literal braces are doubled for ChatPromptTemplate.
+BATCH_PROMPT = """ANALYZE THESE {count} INCIDENTS INDEPENDENTLY:
+
+{incidents}
+
+Do not call any tools. Respond with one JSON object and nothing else:
+{{"decisions": [{{"incident_id": "<ID>", "reasoning": "<why>", "tool_calls": [{{"tool": "<tool name>", "arguments": {{...}}}}]}}]}}
+
+Include exactly one entry per incident ID above. Available tools (all arguments required):
+{tool_specs}"""
+
+DEFAULT_DECISION_BATCH_SIZE = 5
+
+
+def _json_mode(llm: Any) -> Any:
+    if isinstance(llm, ChatOllama):
+        return llm.bind(format="json")
+    return llm.bind(response_format={"type": "json_object"})
+
+
 class IntelligentTicketingAgent:
     """Intelligent agent that autonomously decides which MCP tools to call"""
 
-    def __init__(self):
-        self.llm = ChatOllama(
-            model="llama3.2",
-            base_url="http://localhost:11434",
-            temperature=0.7
-        )
+    def __init__(
+        self,
+        llm_timeout: float = 60.0,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        default_tool_timeout: float = 30.0,
+        tool_concurrency: Optional[Dict[str, int]] = None,
+        default_tool_concurrency: int = 8,
+        decision_cache: Optional[DecisionCache] = None,
+        policy: Optional[DecisionPolicy] = None,
+        mcp_client: Optional[MCPToolClient] = None,
+        tool_batch_window: Optional[float] = DEFAULT_BATCH_WINDOW,
+        idempotency_store: Optional[IdempotencyStore] = None,
+        completion_policy: Optional[CompletionPolicy] = None,
+        token_budget: Optional[TokenBudget] = None,
+        ollama_keep_alive: str = "30m",
+        warmup: bool = True,
+        http_config: Optional[HTTPClientConfig] = None,
+        secondary_llm: Optional[Any] = None,
+        tiering: Optional[TieringPolicy] = None,
+        slack_outbox: Optional[SlackOutbox] = None
+    ):
+        # Upper bound on a single LLM round trip; a hung backend must not
+        # hold an incident decision forever.
+        self.llm_timeout = llm_timeout
+        # Per-tool timeouts (by tool name), so a slow Jira cannot delay a page.
+        self.tool_timeouts = dict(tool_timeouts or {})
+        self.default_tool_timeout = default_tool_timeout
+        # Per-tool circuit breaker + bounded concurrency pool: a failing or
+        # hanging Slack fails fast and cannot tie up PagerDuty's slots.
+        self.tool_concurrency = dict(tool_concurrency or {})
+        self.default_tool_concurrency = default_tool_concurrency
+        self.tool_guards: Dict[str, ToolGuard] = {}
+        # Repeated incidents (same service/severity/components/context) replay
+        # the plan the LLM chose last time instead of reasoning again.
+        self.decision_cache = decision_cache if decision_cache is not None else DecisionCache()
+        # Clear-cut cases from the guidelines are resolved by rules, no LLM.
+        self.policy = policy if policy is not None else DecisionPolicy()
+        # How many incidents took each decision path.
+        self.path_counts = {"policy": 0, "cache": 0, "batch": 0, "llm": 0}
+        self.batch_llm_calls = 0
+        # Stop the agent loop as soon as the incident's required tools have
+        # succeeded instead of paying for a final prose-only LLM round.
+        self.completion_policy = completion_policy if completion_policy is not None else CompletionPolicy()
+        self.llm_calls_saved = 0
+        # Bounds prompt size: trims incident details, compacts old tool turns.
+        self.token_budget = token_budget or TokenBudget()
+        self.ollama_keep_alive = ollama_keep_alive
+        self.http_config = http_config
+        self.llm = self._ollama(DEFAULT_MODEL, temperature=0.7)
+        self.warmup = warmup
+        # Model, iteration cap and token / wall-time budgets per incident class
+        # (severity + context); False keeps the single default model.
+        self.tiering = tiering if tiering is not None else TieringPolicy()
+        self.tier_llms: Dict[str, ModelRouter] = {}
+
+        # Compiled once: static system prefix + per-incident human message.
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_PROMPT),
+            ("human", INCIDENT_PROMPT)
+        ])
         
         # Define the tools the LLM can use
         self.tools = [
@@ -124,7 +265,145 @@ class IntelligentTicketingAgent:
         ]
         
         # Bind tools to LLM
-        self.llm_with_tools = self.llm.bind_tools(self.tools)
+        # Local Ollama first; an OpenAI-compatible endpoint (LLM_SECONDARY_*)
+        # takes hedged requests when Ollama is slow and failover when it errors.
+        self.secondary_llm = secondary_llm if secondary_llm is not None else secondary_llm_from_env(http_config)
+        # One AIMD concurrency limiter and optional tokens-per-minute bucket
+        # (LLM_<BACKEND>_TPM) per backend, shared by all routers using it.
+        self.llm_limiters = {
+            "ollama": AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=16),
+            "secondary": AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=64),
+        }
+        self.token_buckets = {name: token_bucket_from_env(name) for name in self.llm_limiters}
+        self.llm_with_tools = self._route(lambda llm: llm.bind_tools(self.tools))
+
+        # Batch decisions ask for plain JSON and validate it against the tool schemas
+        self.batch_llm = self._route(_json_mode)
+        self.batch_prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_PROMPT),
+            ("human", BATCH_PROMPT)
+        ])
+        self.tool_schemas = {t.name: t.tool_call_schema for t in self.tools}
+        self.tool_specs = "\n".join(
+            f"- {t.name}({', '.join(t.args)}): {t.description.splitlines()[0]}" for t in self.tools
+        )
+
+        # Long-lived sessions to the IncidentTools server (MCP_SERVER_URL for a
+        # shared HTTP server, in-process otherwise) and the tool name -> handler
+        # registry, both set up once in start().
+        self.mcp_client = mcp_client or MCPToolClient(os.getenv("MCP_SERVER_URL"))
+        # Tool calls from concurrently processed incidents that land in the
+        # same window go out as one batch call per backend (None disables).
+        self.tool_batcher = (
+            ToolBatcher(self.mcp_client, tool_batch_window) if tool_batch_window is not None else None
+        )
+        self.tool_handlers: Dict[str, ToolHandler] = {}
+        self._start_lock = asyncio.Lock()
+
+        # Every outbound tool call is keyed by incident, tool and normalized
+        # arguments; repeats get the recorded result instead of a new ticket/page.
+        self.idempotency_store = idempotency_store or IdempotencyStore()
+
+        # During alert storms, later Slack alerts for the same channel and
+        # service are folded into one digest per window (False disables).
+        self.slack_outbox = (
+            slack_outbox if slack_outbox is not None
+            else SlackOutbox(lambda args: self._call_tool("send_slack_alert", args))
+        )
+
+    def _ollama(self, model: str, temperature: float, num_predict: Optional[int] = None) -> ChatOllama:
+        return ChatOllama(
+            model=model,
+            base_url="http://localhost:11434",
+            temperature=temperature,
+            num_predict=num_predict,
+            # Keep the model (and its KV cache for the system prefix) loaded
+            # between incidents instead of reloading after Ollama's 5m default.
+            keep_alive=self.ollama_keep_alive,
+            # Shared connection pool / per-host limits across all agents
+            async_client_kwargs=ollama_client_kwargs(self.http_config)
+        )
+
+    def _route(self, configure: Callable[[Any], Any], primary: Optional[Any] = None) -> ModelRouter:
+        backends = [self._backend("ollama", configure(primary or self.llm))]
+        if self.secondary_llm is not None:
+            backends.append(self._backend("secondary", configure(self.secondary_llm)))
+        return ModelRouter(backends)
+
+    def _backend(self, name: str, runnable: Any) -> LLMBackend:
+        return LLMBackend(
+            name, runnable, limiter=self.llm_limiters[name], token_bucket=self.token_buckets[name]
+        )
+
+    def llm_limit_metrics(self) -> Dict[str, Any]:
+        """Current concurrency limit, in-flight calls, queueing delay and token budget per backend."""
+        return {
+            name: {
+                "concurrency": limiter.metrics(),
+                "tokens": self.token_buckets[name].metrics() if self.token_buckets[name] else None,
+            }
+            for name, limiter in self.llm_limiters.items()
+            if name == "ollama" or self.secondary_llm is not None
+        }
+
+    def _tier_llm(self, tier: ModelTier) -> ModelRouter:
+        """Tool-calling router for a tier's model, built on first use."""
+        router = self.tier_llms.get(tier.name)
+        if router is None:
+            llm = self._ollama(tier.model, tier.temperature, num_predict=tier.max_output_tokens)
+            router = self.tier_llms[tier.name] = self._route(lambda l: l.bind_tools(self.tools), llm)
+        return router
+
+    def _decision_llms(self) -> Dict[str, ModelRouter]:
+        """Tool-calling routers the agent loop uses, one per distinct model."""
+        if not self.tiering:
+            return {self.llm.model: self.llm_with_tools}
+        routers: Dict[str, ModelRouter] = {}
+        for tier in self.tiering.tiers.values():
+            if tier.model not in routers:
+                routers[tier.model] = self._tier_llm(tier)
+        return routers
+
+    def llm_stats(self) -> Dict[str, Any]:
+        """Per-backend latency (p50/p99), hedges and failovers for each router."""
+        routers = [("batch", self.batch_llm)]
+        if not self.tiering:
+            routers.insert(0, ("agent", self.llm_with_tools))
+        routers += [(f"tier:{name}", router) for name, router in self.tier_llms.items()]
+        return {name: router.stats() for name, router in routers if isinstance(router, ModelRouter)}
+
+    async def start(self, warmup: Optional[bool] = None):
+        """Open the MCP sessions, build the tool registry and warm up the LLM (idempotent)."""
+        async with self._start_lock:
+            if self.tool_handlers:
+                return
+            await self.mcp_client.start()
+            self.tool_handlers = self.mcp_client.build_registry(self.tool_batcher)
+            if self.warmup if warmup is None else warmup:
+                await self._warmup_llm()
+
+    async def _warmup_llm(self):
+        """Load each decision model and prime the server's cache for the static prefix."""
+        async def warm(model: str, router: ModelRouter):
+            try:
+                await asyncio.wait_for(
+                    router.ainvoke([
+                        SystemMessage(content=SYSTEM_PROMPT),
+                        HumanMessage(content="Warm-up request: reply with OK and do not call any tools.")
+                    ]),
+                    timeout=self.llm_timeout
+                )
+                print(f"🔥 LLM {model} warmed up (model loaded, system prompt prefix cached)")
+            except Exception as e:
+                print(f"⚠️  LLM {model} warm-up failed, continuing without it: {e}")
+
+        await asyncio.gather(*(warm(model, router) for model, router in self._decision_llms().items()))
+
+    async def close(self):
+        if self.slack_outbox:
+            await self.slack_outbox.flush()
+        await self.mcp_client.close()
+        self.tool_handlers = {}
     
     def _describe_context(self, context: IncidentContext) -> str:
         parts = []
@@ -148,69 +427,516 @@ class IntelligentTicketingAgent:
         
         return "\n".join(parts)
     
-    async def make_decision_and_execute(
-        self, 
-        incident: Incident, 
-        context: IncidentContext, 
+    def _tool_guard(self, tool_name: str) -> ToolGuard:
+        guard = self.tool_guards.get(tool_name)
+        if guard is None:
+            guard = self.tool_guards[tool_name] = ToolGuard(
+                tool_name,
+                CircuitBreaker(tool_name),
+                Bulkhead(
+                    tool_name,
+                    max_concurrent=self.tool_concurrency.get(tool_name, self.default_tool_concurrency),
+                    max_wait=self.tool_timeouts.get(tool_name, self.default_tool_timeout)
+                )
+            )
+        return guard
+
+    def tool_health(self) -> Dict[str, Dict[str, Any]]:
+        """Breaker state and bulkhead usage per tool."""
+        return {name: guard.stats() for name, guard in self.tool_guards.items()}
+
+    async def _call_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Dict[str, Any]:
+        """One tool call through its circuit breaker and bulkhead, bounded by its timeout.
+
+        An open breaker fails fast with a "backend unavailable" error for the LLM.
+        """
+        handler = self.tool_handlers[tool_name]
+        timeout = self.tool_timeouts.get(tool_name, self.default_tool_timeout)
+
+        async def invoke() -> Dict[str, Any]:
+            try:
+                return await asyncio.wait_for(handler(tool_args), timeout=timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"{tool_name} timed out after {timeout}s") from None
+
+        return await self._tool_guard(tool_name).run(invoke)
+
+    async def _execute_tool_call(self, incident: Incident, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one tool call at most once per idempotency key.
+
+        Slack alerts go through the outbox, which may fold them into a digest.
+        """
+        tool_name = tool_call["name"]
+        tool_args = tool_call["args"]
+
+        if not self.tool_handlers:
+            await self.start(warmup=False)
+        if tool_name not in self.tool_handlers:
+            return {"status": "error", "message": f"Unknown tool: {tool_name}"}
+
+        async def call() -> Dict[str, Any]:
+            if tool_name == "send_slack_alert" and self.slack_outbox:
+                return await self.slack_outbox.send(tool_args, incident.service, incident.id)
+            return await self._call_tool(tool_name, tool_args)
+
+        key = idempotency_key(incident.id, tool_name, tool_args)
+        result, replayed = await self.idempotency_store.run(key, tool_name, call)
+        if replayed:
+            print(f"  ♻️  {tool_name} already done for {incident.id} - returning recorded result")
+            result = {**result, "idempotent_replay": True}
+        return result
+
+    def _record_tool_result(
+        self,
+        incident: Incident,
+        tool_name: str,
+        tool_args: Dict[str, Any],
+        result: Dict[str, Any],
+        tickets: List[Ticket],
+        actions: List[str]
+    ):
+        """Build tickets and actions for the response from a tool result"""
+        if result.get("idempotent_replay") and any(
+            t.ticket_id in (result.get("ticket_id"), result.get("incident_id")) for t in tickets
+        ):
+            # Same call repeated within this decision: already recorded.
+            return
+
+        if tool_name == "create_jira_issue" and result.get("status") == "success":
+            tickets.append(Ticket(
+                ticket_id=result['ticket_id'],
+                incident_id=incident.id,
+                platform="Jira",
+                title=tool_args["summary"],
+                description=tool_args["description"],
+                priority=tool_args["priority"],
+                assignee=None,
+                created_at=datetime.now().isoformat()
+            ))
+            actions.append(f"✅ Jira: {result['ticket_id']} (Priority: {tool_args['priority']})")
+        
+        elif tool_name == "create_pagerduty_incident" and result.get("status") == "success":
+            tickets.append(Ticket(
+                ticket_id=result['incident_id'],
+                incident_id=incident.id,
+                platform="PagerDuty",
+                title=tool_args["title"],
+                description=tool_args["description"],
+                priority=incident.severity.value,
+                assignee="On-call Engineer",
+                created_at=datetime.now().isoformat(),
+                url=result['url']
+            ))
+            actions.append(f"🚨 PagerDuty: {result['incident_id']} (Urgency: {tool_args['urgency']})")
+        
+        elif tool_name == "send_slack_alert" and result.get("status") == "success":
+            digest = " (in digest)" if result.get("coalesced") else ""
+            actions.append(f"💬 Slack: {tool_args['channel']}{digest}")
+    
+    async def _run_tool_calls(
+        self,
+        incident: Incident,
+        tool_calls: List[Dict[str, Any]],
+        tickets: List[Ticket],
+        actions: List[str],
+        tool_calls_made: List[Dict[str, Any]],
+        started: Optional[List[Awaitable[Dict[str, Any]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute tool calls concurrently and record them in order.
+
+        ``started`` holds executions already in flight for ``tool_calls``
+        (dispatched while the LLM response was streaming).
+        Returns the payload to report back for each call (its result, or an
+        error dict), in the same order as ``tool_calls``.
+        """
+        if started is None:
+            started = [self._execute_tool_call(incident, tool_call) for tool_call in tool_calls]
+        # gather keeps results in tool_call order even though calls overlap.
+        results = await asyncio.gather(*started, return_exceptions=True)
+
+        payloads = []
+        for tool_call, result in zip(tool_calls, results):
+            tool_name = tool_call["name"]
+            tool_args = tool_call["args"]
+            
+            print(f"\n  Tool: {tool_name}")
+            print(f"  Args: {json.dumps(tool_args, indent=4)}")
+            
+            try:
+                if isinstance(result, BaseException):
+                    raise result
+                
+                print(f"  Result: {result}")
+                
+                # Track the tool call
+                tool_calls_made.append({
+                    "tool": tool_name,
+                    "arguments": tool_args,
+                    "result": result
+                })
+                
+                self._record_tool_result(incident, tool_name, tool_args, result, tickets, actions)
+                payloads.append(result)
+            
+            except Exception as e:
+                print(f"  ❌ Error executing tool: {e}")
+                payloads.append({"status": "error", "message": str(e) or type(e).__name__})
+        
+        return payloads
 
+    def _build_decision(
+        self,
+        tickets: List[Ticket],
+        actions: List[str],
+        tool_calls_made: List[Dict[str, Any]],
+        reasoning_text: str,
+        source: str
     ) -> Dict[str, Any]:
-        """Let the LLM autonomously decide which MCP tools to call and execute them"""
+        # Add a note if no tools were called
+        if not actions:
+            actions.append("⚠️ LLM decided no immediate action needed")
         
-        system_prompt = """You are an expert incident coordinator with 15+ years of SRE experience.
+        return {
+            "tickets": tickets,
+            "actions": actions,
+            "reasoning": [reasoning_text or f"LLM autonomously called {len(tool_calls_made)} tool(s)"],
+            "tool_calls": tool_calls_made,
+            "decision_summary": {
+                "total_tools_called": len(tool_calls_made),
+                "tools_used": [tc["tool"] for tc in tool_calls_made],
+                "jira_created": any(tc["tool"] == "create_jira_issue" for tc in tool_calls_made),
+                "pagerduty_created": any(tc["tool"] == "create_pagerduty_incident" for tc in tool_calls_made),
+                "slack_sent": any(tc["tool"] == "send_slack_alert" for tc in tool_calls_made),
+                "autonomous_decision": source != "policy",
+                "decision_source": source
+            }
+        }
 
-You have access to tools for managing incidents. Analyze the incident carefully and decide which tools to call.
+    async def _execute_plan(
+        self,
+        incident: Incident,
+        plan: List[Dict[str, Any]],
+        reasoning_text: str,
+        source: str
+    ) -> Dict[str, Any]:
+        """Run a pre-computed tool plan directly against the tools (no LLM)."""
+        tickets = []
+        actions = []
+        tool_calls_made = []
+        tool_calls = [
+            {"name": step["tool"], "args": step["arguments"], "id": f"{source}-{i}"}
+            for i, step in enumerate(plan)
+        ]
+        await self._run_tool_calls(incident, tool_calls, tickets, actions, tool_calls_made)
+        return self._build_decision(tickets, actions, tool_calls_made, reasoning_text, source)
 
-DECISION GUIDELINES:
-- ALWAYS create a Jira ticket for tracking (choose appropriate priority)
-- Send Slack alerts for team visibility (choose channel based on severity)
-- ONLY create PagerDuty incidents for truly critical issues:
-  * Customer-facing outages affecting many users
-  * Revenue-impacting payment/checkout failures
-  * Security breaches or data loss
-- DO NOT wake engineers for:
-  * Internal tools during off-hours
-  * Issues that can wait until business hours
-  * Potential issues without confirmed customer impact
+    def _fast_path_plan(
+        self,
+        incident: Incident,
+        context: IncidentContext
+    ) -> Optional[Tuple[List[Dict[str, Any]], str, str]]:
+        """``(plan, reasoning, source)`` from a policy rule or cached plan, or None."""
+        match = self.policy.evaluate(incident, context) if self.policy else None
+        if match is not None:
+            self.path_counts["policy"] += 1
+            print(f"\n📏 Policy fast path for {incident.id}: {match.rule}")
+            return match.plan, match.reasoning, "policy"
 
-Think: "Would I want to be woken at 3 AM for this?" If no, don't page.
+        cached = self.decision_cache.get(incident_fingerprint(incident, context)) if self.decision_cache else None
+        if cached is not None:
+            self.path_counts["cache"] += 1
+            print(f"\n⚡ Decision cache hit for {incident.id} - replaying {len(cached['plan'])} tool call(s)")
+            # Only the decision is reused: ticket, page and Slack text describe this incident
+            plan = with_incident_text(
+                cached["plan"], incident,
+                "Same tool plan as an earlier incident with identical service, severity, components and context."
+            )
+            return plan, cached["reasoning"], "cache"
+        return None
 
-Analyze the incident, explain your reasoning, then call the appropriate tools."""
+    def _cache_decision(self, incident: Incident, context: IncidentContext, decision: Dict[str, Any]):
+        """Store the successful tool calls of a finished decision as a reusable plan."""
+        if not (self.decision_cache and decision["tool_calls"]):
+            return
+        # Calls that errored are left out so a replay doesn't repeat them
+        plan = [
+            {"tool": tc["tool"], "arguments": tc["arguments"]}
+            for tc in decision["tool_calls"]
+            if not (isinstance(tc["result"], dict) and tc["result"].get("status") == "error")
+        ]
+        self.decision_cache.put(
+            incident_fingerprint(incident, context), plan, decision["reasoning"][0]
+        )
 
-        user_prompt = f"""ANALYZE THIS INCIDENT:
+    async def make_decision_and_execute(
+        self,
+        incident: Incident,
+        context: IncidentContext
+    ) -> Dict[str, Any]:
+        """Decide which MCP tools to call for an incident and execute them.
 
-**Incident Details:**
-- ID: {incident.id}
-- Title: {incident.title}
-- Severity: {incident.severity.value}
-- Service: {incident.service}
-- Region: {incident.region}
+        Paths, cheapest first: a deterministic policy rule for clear-cut
+        cases, a cached plan for an identical incident fingerprint, and
+        finally the LLM agent loop for ambiguous incidents.
+        """
+        fast = self._fast_path_plan(incident, context)
+        if fast is not None:
+            return await self._execute_plan(incident, *fast)
+        return await self._decide_single(incident, context)
 
-**Context:**
-{self._describe_context(context)}
+    async def _decide_single(self, incident: Incident, context: IncidentContext) -> Dict[str, Any]:
+        self.path_counts["llm"] += 1
+        decision, completed = await self._decide_with_llm(incident, context)
+        # A cut-short loop (timeout, error) may have missed tools it would have called
+        if completed:
+            self._cache_decision(incident, context, decision)
+        return decision
 
-**Technical Details:**
-- Error Rate: {incident.metrics.get('error_rate', 'N/A')}
-- Affected Components: {', '.join(incident.affected_components)}
+    async def make_batch_decisions(
+        self,
+        items: List[Tuple[Incident, IncidentContext]],
+        batch_size: int = DEFAULT_DECISION_BATCH_SIZE
+    ) -> List[Dict[str, Any]]:
+        """Decide and execute for several incidents, up to ``batch_size`` per LLM call.
 
-**Recent Logs:**
-{chr(10).join(incident.logs[:3])}
+        Policy and cache fast paths still apply per incident. The remaining
+        incidents are sent to the LLM together and answered with a JSON tool
+        plan each; an incident whose plan is missing or invalid falls back to
+        the single-incident agent loop. Results are in input order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
 
-**Questions to Consider:**
-1. Would YOU want to be woken up for this at this time?
-2. How many customers are affected RIGHT NOW?
-3. Can this wait until business hours?
-4. Is this causing revenue loss or just potential issues?
+        async def run_fast(index: int, plan: List[Dict[str, Any]], reasoning: str, source: str):
+            results[index] = await self._execute_plan(items[index][0], plan, reasoning, source)
 
-Think through your decision and call the appropriate tools now."""
+        async def run_single(index: int):
+            results[index] = await self._decide_single(*items[index])
 
-        messages = [
-            HumanMessage(content=system_prompt + "\n\n" + user_prompt)
-        ]
+        runs = []
+        ambiguous = []
+        for index, (incident, context) in enumerate(items):
+            fast = self._fast_path_plan(incident, context)
+            if fast is not None:
+                runs.append(run_fast(index, *fast))
+            else:
+                ambiguous.append(index)
+
+        for start in range(0, len(ambiguous), max(batch_size, 1)):
+            chunk = ambiguous[start:start + max(batch_size, 1)]
+            if len(chunk) == 1:
+                runs.append(run_single(chunk[0]))
+            else:
+                runs.append(self._decide_batch(items, chunk, results))
+
+        await asyncio.gather(*runs)
+        return results
+
+    async def _decide_batch(
+        self,
+        items: List[Tuple[Incident, IncidentContext]],
+        chunk: List[int],
+        results: List[Optional[Dict[str, Any]]]
+    ):
+        """One LLM call for the incidents at ``chunk``; results are written in place."""
+        plans = await self._request_batch_plans([items[index] for index in chunk])
+
+        async def run(index: int):
+            incident, context = items[index]
+            planned = plans.get(incident.id)
+            if planned is None:
+                print(f"\n↩️  No valid batch plan for {incident.id} - falling back to single-incident mode")
+                results[index] = await self._decide_single(incident, context)
+                return
+            plan, reasoning = planned
+            self.path_counts["batch"] += 1
+            decision = await self._execute_plan(incident, plan, reasoning, "batch")
+            decision["decision_summary"]["batch_size"] = len(chunk)
+            self._cache_decision(incident, context, decision)
+            results[index] = decision
+
+        await asyncio.gather(*(run(index) for index in chunk))
+
+    async def _request_batch_plans(
+        self,
+        chunk: List[Tuple[Incident, IncidentContext]]
+    ) -> Dict[str, Tuple[List[Dict[str, Any]], str]]:
+        """Ask the LLM for a plan per incident; returns the valid ones by incident ID."""
+        incidents = "\n\n".join(
+            f"--- Incident {n} of {len(chunk)} ---\n" + INCIDENT_DETAILS.format(**self._prompt_fields(incident, context))
+            for n, (incident, context) in enumerate(chunk, 1)
+        )
+        messages = self.batch_prompt.format_messages(
+            count=len(chunk), incidents=incidents, tool_specs=self.tool_specs
+        )
+
+        print(f"\n📦 Batch decision for {len(chunk)} incidents: {', '.join(i.id for i, _ in chunk)}")
+        try:
+            response = await asyncio.wait_for(self.batch_llm.ainvoke(messages), timeout=self.llm_timeout)
+            self.batch_llm_calls += 1
+            payload = json.loads(response.content)
+        except asyncio.TimeoutError:
+            print(f"❌ Batch LLM call timed out after {self.llm_timeout}s")
+            return {}
+        except Exception as e:
+            print(f"❌ Batch decision failed: {e}")
+            return {}
+
+        entries = payload.get("decisions") if isinstance(payload, dict) else payload
+        if not isinstance(entries, list):
+            print("❌ Batch response has no decisions list")
+            return {}
+
+        expected = {incident.id for incident, _ in chunk}
+        plans = {}
+        for entry in entries:
+            incident_id = entry.get("incident_id") if isinstance(entry, dict) else None
+            if incident_id not in expected or incident_id in plans:
+                continue
+            plan = self._validate_plan(entry.get("tool_calls"))
+            if plan is None:
+                print(f"⚠️  Invalid batch plan for {incident_id}")
+                continue
+            plans[incident_id] = (plan, str(entry.get("reasoning") or ""))
+        return plans
+
+    def _validate_plan(self, steps: Any) -> Optional[List[Dict[str, Any]]]:
+        """Check a plan against the tool schemas; None if any step is invalid."""
+        if not isinstance(steps, list):
+            return None
+        plan = []
+        for step in steps:
+            schema = self.tool_schemas.get(step.get("tool")) if isinstance(step, dict) else None
+            if schema is None:
+                return None
+            try:
+                arguments = schema.model_validate(step.get("arguments")).model_dump()
+            except ValueError:
+                return None
+            plan.append({"tool": step["tool"], "arguments": arguments})
+        return plan
+
+    def _prompt_fields(self, incident: Incident, context: IncidentContext) -> Dict[str, Any]:
+        """Incident fields for INCIDENT_DETAILS, logs and metrics fitted to the token budget."""
+        logs, metrics = self.token_budget.fit_incident_details(incident.logs, incident.metrics)
+        return {
+            "incident_id": incident.id,
+            "title": incident.title,
+            "severity": incident.severity.value,
+            "service": incident.service,
+            "region": incident.region,
+            "context": self._describe_context(context),
+            "error_rate": incident.metrics.get('error_rate', 'N/A'),
+            "metrics": json.dumps(metrics, default=str),
+            "components": ', '.join(incident.affected_components),
+            "logs": chr(10).join(logs)
+        }
+
+    def _dispatch_tool_chunk(
+        self,
+        incident: Incident,
+        tool_chunk: Dict[str, Any],
+        dispatched: List[Tuple[Dict[str, Any], asyncio.Task, float]]
+    ):
+        """Start executing a fully streamed tool call."""
+        try:
+            args = json.loads(tool_chunk.get("args") or "{}")
+        except ValueError:
+            args = None
+        if not tool_chunk.get("name") or not isinstance(args, dict):
+            print(f"⚠️  Ignoring malformed tool call from LLM: {tool_chunk}")
+            return
+        tool_call = {
+            "name": tool_chunk["name"],
+            "args": args,
+            "id": tool_chunk.get("id") or new_id("call-"),
+            "type": "tool_call"
+        }
+        print(f"⚡ Dispatching {tool_call['name']} while the response streams")
+        task = asyncio.create_task(self._execute_tool_call(incident, tool_call))
+        dispatched.append((tool_call, task, time.monotonic()))
+
+    async def _stream_response(
+        self,
+        incident: Incident,
+        llm: Any,
+        messages: List[BaseMessage],
+        dispatched: List[Tuple[Dict[str, Any], asyncio.Task, float]]
+    ) -> AIMessage:
+        """Stream one LLM turn, starting each tool call as soon as its arguments are complete.
+
+        A call is complete when the provider sends it whole (no chunk index,
+        as Ollama does), when the next call starts, or when the stream ends.
+        Returns the response with the dispatched calls as its tool_calls.
+        """
+        response = None
+        seen = 0  # tool_call_chunks already dispatched (or dropped as malformed)
+        async for chunk in llm.astream(messages):
+            response = chunk if response is None else response + chunk
+            pending = response.tool_call_chunks[seen:]
+            for position, tool_chunk in enumerate(pending):
+                if tool_chunk.get("index") is not None and position == len(pending) - 1:
+                    break  # arguments may still be streaming
+                self._dispatch_tool_chunk(incident, tool_chunk, dispatched)
+                seen += 1
+
+        if response is None:
+            return AIMessage(content="")
+        for tool_chunk in response.tool_call_chunks[seen:]:
+            self._dispatch_tool_chunk(incident, tool_chunk, dispatched)
+        return AIMessage(
+            content=response.content,
+            tool_calls=[tc for tc, _, _ in dispatched],
+            usage_metadata=response.usage_metadata
+        )
+
+    async def _collect_dispatched(
+        self,
+        incident: Incident,
+        dispatched: List[Tuple[Dict[str, Any], asyncio.Task, float]],
+        tickets: List[Ticket],
+        actions: List[str],
+        tool_calls_made: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Wait for the dispatched tool calls and record them (clears ``dispatched``)."""
+        tool_calls = [tc for tc, _, _ in dispatched]
+        tasks = [task for _, task, _ in dispatched]
+        dispatched.clear()
+        return await self._run_tool_calls(incident, tool_calls, tickets, actions, tool_calls_made, tasks)
+
+    async def _decide_with_llm(
+        self,
+        incident: Incident,
+        context: IncidentContext
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Let the LLM autonomously decide which MCP tools to call and execute them.
+
+        Returns the decision and whether the agent loop finished cleanly.
+        """
+        # Only this per-incident delta changes between calls; the system
+        # prefix and tool schemas stay byte-identical.
+        messages = self.prompt.format_messages(**self._prompt_fields(incident, context))
+        started_at = time.monotonic()
         
         tickets = []
         actions = []
         tool_calls_made = []
         reasoning_text = ""
+        completed = False
+        llm_calls = 0
+        prompt_tokens_per_iteration = []
+        succeeded_tools = set()
+        dispatched: List[Tuple[Dict[str, Any], asyncio.Task, float]] = []
+        first_action_at = None
+        required_tools = (
+            self.completion_policy.required_tools(incident, context) if self.completion_policy else None
+        )
+        tier = self.tiering.select(incident, context) if self.tiering else None
+        llm = self._tier_llm(tier) if tier else self.llm_with_tools
+        max_iterations = tier.max_iterations if tier else 10
+        deadline = started_at + tier.wall_time_budget if tier else None
+        tokens_used = 0
+        budget_exhausted = None
+        loop_error = None
         
         print("\n" + "="*80)
         print("🤖 LLM AGENT - Analyzing incident and deciding on actions...")
@@ -218,15 +944,48 @@ Think through your decision and call the appropriate tools now."""
         print(f"\nIncident: {incident.title}")
         print(f"Severity: {incident.severity.value}")
         print(f"Context: {self._describe_context(context)}")
+        if tier:
+            print(f"Tier: {tier.name} ({tier.model}) - up to {tier.max_iterations} LLM calls, "
+                  f"{tier.token_budget} tokens, {tier.wall_time_budget:.0f}s")
         
         # Agent loop - let LLM make autonomous decisions
-        max_iterations = 10
         for iteration in range(max_iterations):
             print(f"\n--- Iteration {iteration + 1} ---")
+            timeout = self.llm_timeout
             
             try:
-                # Get LLM response with tool binding
-                response = self.llm_with_tools.invoke(messages)
+                # Re-send a bounded history: earlier tool turns are summarized
+                messages = self.token_budget.compact_history(messages)
+                prompt_tokens = count_message_tokens(messages)
+                prompt_tokens_per_iteration.append(prompt_tokens)
+                print(f"📏 Prompt tokens: {prompt_tokens} (budget {self.token_budget.prompt_budget})")
+                if prompt_tokens > self.token_budget.prompt_budget:
+                    print("⚠️  Prompt exceeds token budget even after compaction")
+                
+                # Per-incident budgets from the tier: stop rather than overspend
+                if tier and tokens_used + prompt_tokens > tier.token_budget:
+                    print(f"\n💸 Token budget exhausted ({tokens_used}/{tier.token_budget} used)")
+                    budget_exhausted = "tokens"
+                    break
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        print(f"\n💸 Wall-time budget exhausted ({tier.wall_time_budget:.0f}s)")
+                        budget_exhausted = "wall_time"
+                        break
+                    timeout = min(timeout, remaining)
+                
+                # Stream the LLM response with tool binding; each tool call
+                # starts as soon as it is complete, while the model keeps writing
+                response = await asyncio.wait_for(
+                    self._stream_response(incident, llm, messages, dispatched),
+                    timeout=timeout
+                )
+                llm_calls += 1
+                usage = response.usage_metadata
+                tokens_used += usage["total_tokens"] if usage else prompt_tokens + count_message_tokens([response])
+                if first_action_at is None and dispatched:
+                    first_action_at = dispatched[0][2]
                 print("-------------------res-----------")
                 print(response)
                 
@@ -237,114 +996,88 @@ Think through your decision and call the appropriate tools now."""
                     # Add AI response to conversation
                     messages.append(response)
                     
-                    # Execute each tool call
-                    for tool_call in response.tool_calls:
-                        tool_name = tool_call["name"]
-                        tool_args = tool_call["args"]
-                        tool_id = tool_call.get("id", "unknown")
-                        
-                        print(f"\n  Tool: {tool_name}")
-                        print(f"  Args: {json.dumps(tool_args, indent=4)}")
-                        
-                        # Execute the tool directly based on name
-                        try:
-                            # Call the actual MCP function
-                            if tool_name == "create_jira_issue":
-                                result = await create_jira_issue.ainvoke(tool_args)
-                            elif tool_name == "send_slack_alert":
-                                result = await send_slack_alert.ainvoke(tool_args)
-                            elif tool_name == "create_pagerduty_incident":
-                                result = await create_pagerduty_incident.ainvoke(tool_args)
-                            else:
-                                result = {"status": "error", "message": f"Unknown tool: {tool_name}"}
-                            
-                            print(f"  Result: {result}")
-                            
-                            # Track the tool call
-                            tool_calls_made.append({
-                                "tool": tool_name,
-                                "arguments": tool_args,
-                                "result": result
-                            })
-                            
-                            # Build tickets and actions for response
-                            if tool_name == "create_jira_issue" and result.get("status") == "success":
-                                tickets.append(Ticket(
-                                    ticket_id=result['ticket_id'],
-                                    incident_id=incident.id,
-                                    platform="Jira",
-                                    title=tool_args["summary"],
-                                    description=tool_args["description"],
-                                    priority=tool_args["priority"],
-                                    assignee=None,
-                                    created_at=datetime.now().isoformat()
-                                ))
-                                actions.append(f"✅ Jira: {result['ticket_id']} (Priority: {tool_args['priority']})")
-                            
-                            elif tool_name == "create_pagerduty_incident" and result.get("status") == "success":
-                                tickets.append(Ticket(
-                                    ticket_id=result['incident_id'],
-                                    incident_id=incident.id,
-                                    platform="PagerDuty",
-                                    title=tool_args["title"],
-                                    description=tool_args["description"],
-                                    priority=incident.severity.value,
-                                    assignee="On-call Engineer",
-                                    created_at=datetime.now().isoformat(),
-                                    url=result['url']
-                                ))
-                                actions.append(f"🚨 PagerDuty: {result['incident_id']} (Urgency: {tool_args['urgency']})")
-                            
-                            elif tool_name == "send_slack_alert" and result.get("status") == "success":
-                                actions.append(f"💬 Slack: {tool_args['channel']}")
-                            
-                            # Send tool result back to LLM
-                            messages.append(ToolMessage(
-                                content=json.dumps(result),
-                                tool_call_id=tool_id
-                            ))
-                        
-                        except Exception as e:
-                            print(f"  ❌ Error executing tool: {e}")
-                            error_result = {"status": "error", "message": str(e)}
-                            messages.append(ToolMessage(
-                                content=json.dumps(error_result),
-                                tool_call_id=tool_id
-                            ))
+                    # Tool calls of this turn are already running concurrently
+                    payloads = await self._collect_dispatched(
+                        incident, dispatched, tickets, actions, tool_calls_made
+                    )
+                    
+                    # Send tool results back to LLM
+                    for tool_call, payload in zip(response.tool_calls, payloads):
+                        messages.append(ToolMessage(
+                            content=json.dumps(payload),
+                            tool_call_id=tool_call.get("id", "unknown")
+                        ))
+                    
+                    succeeded_tools.update(
+                        tool_call["name"] for tool_call, payload in zip(response.tool_calls, payloads)
+                        if payload.get("status") != "error"
+                    )
+                    if required_tools and required_tools <= succeeded_tools:
+                        # Everything this incident needs is done; the reasoning
+                        # that came with the tool calls is enough.
+                        print(f"\n✅ Required actions complete ({', '.join(sorted(required_tools))}) - "
+                              "skipping final LLM round")
+                        completed = True
+                        self.llm_calls_saved += 1
+                        reasoning_text = response.content if isinstance(response.content, str) else ""
+                        break
                 
                 else:
                     # No more tool calls - LLM is done
                     print("\n✅ LLM finished decision-making")
+                    completed = True
                     if hasattr(response, 'content') and response.content:
                         reasoning_text = response.content
                         print(f"\nReasoning: {reasoning_text[:300]}...")
                     break
             
+            except asyncio.TimeoutError:
+                print(f"\n❌ LLM call timed out after {timeout:.1f}s")
+                loop_error = f"LLM call timed out after {timeout:.1f}s"
+                if timeout < self.llm_timeout:
+                    budget_exhausted = "wall_time"
+                break
+
             except Exception as e:
                 print(f"\n❌ Error in agent loop: {e}")
                 import traceback
                 traceback.print_exc()
+                loop_error = str(e) or type(e).__name__
                 break
+        else:
+            print(f"\n💸 Iteration budget exhausted ({max_iterations} LLM calls)")
+            budget_exhausted = "iterations"
+        
+        # A stream that failed part-way may already have started tool calls
+        if dispatched:
+            if first_action_at is None:
+                first_action_at = dispatched[0][2]
+            await self._collect_dispatched(incident, dispatched, tickets, actions, tool_calls_made)
         
         print("\n" + "="*80)
         print(f"✅ EXECUTION COMPLETE - {len(tool_calls_made)} MCP tool(s) called")
         print("="*80)
         
-        # Add a note if no tools were called
-        if not actions:
-            actions.append("⚠️ LLM decided no immediate action needed")
-        
-        return {
-            "tickets": tickets,
-            "actions": actions,
-            "reasoning": [reasoning_text or f"LLM autonomously called {len(tool_calls_made)} tool(s)"],
-            "tool_calls": tool_calls_made,
-            "decision_summary": {
-                "total_tools_called": len(tool_calls_made),
-                "tools_used": [tc["tool"] for tc in tool_calls_made],
-                "jira_created": any(tc["tool"] == "create_jira_issue" for tc in tool_calls_made),
-                "pagerduty_created": any(tc["tool"] == "create_pagerduty_incident" for tc in tool_calls_made),
-                "slack_sent": any(tc["tool"] == "send_slack_alert" for tc in tool_calls_made),
-                "autonomous_decision": True
-            }
-        }
\ No newline at end of file
+        decision = self._build_decision(tickets, actions, tool_calls_made, reasoning_text, "llm")
+        decision["decision_summary"]["llm_calls"] = llm_calls
+        decision["decision_summary"]["prompt_tokens_per_iteration"] = prompt_tokens_per_iteration
+        decision["decision_summary"]["time_to_first_action_s"] = (
+            round(first_action_at - started_at, 3) if first_action_at is not None else None
+        )
+        decision["decision_summary"]["budget"] = {
+            "tier": tier.name if tier else None,
+            "model": tier.model if tier else self.llm.model,
+            "llm_calls": llm_calls,
+            "max_iterations": max_iterations,
+            "tokens_used": tokens_used,
+            "token_budget": tier.token_budget if tier else None,
+            "wall_time_s": round(time.monotonic() - started_at, 3),
+            "wall_time_budget_s": tier.wall_time_budget if tier else None,
+            "exhausted": budget_exhausted
+        }
+        # A loop cut short may have missed the ticket or page: callers (the
+        # queue listener) must treat the incident as failed, not handled.
+        decision["decision_summary"]["completed"] = completed
+        if not completed:
+            decision["decision_summary"]["error"] = loop_error or f"{budget_exhausted} budget exhausted"
+        return decision, completed
@@ -0,0 +1,124 @@
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # optional dependency; fall back to a character estimate
+    _ENCODING = None
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role/separator tokens per chat message
+
+# Result fields worth keeping when an old tool result is compacted.
+SUMMARY_KEYS = ("status", "ticket_id", "incident_id", "channel", "priority", "urgency", "message")
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps([{"name": tc["name"], "args": tc["args"]} for tc in tool_calls], default=str)
+    return text
+
+
+def count_message_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(count_tokens(_message_text(m)) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    return text if len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+
+class TokenBudget:
+    """Keeps the agent's prompt within a token budget.
+
+    The incident details (logs, metrics) are trimmed to fit before the first
+    call, and on later iterations tool results and model text from earlier
+    turns are compacted to short summaries, so each round re-sends a bounded
+    history instead of everything so far.
+    """
+
+    def __init__(
+        self,
+        prompt_budget: int = 3000,
+        incident_detail_budget: int = 600,
+        max_log_lines: int = 3,
+        max_log_line_chars: int = 300,
+        summary_chars: int = 160
+    ):
+        self.prompt_budget = prompt_budget
+        self.incident_detail_budget = incident_detail_budget
+        self.max_log_lines = max_log_lines
+        self.max_log_line_chars = max_log_line_chars
+        self.summary_chars = summary_chars
+
+    def fit_incident_details(
+        self,
+        logs: List[str],
+        metrics: Dict[str, Any]
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """Logs and metrics to put in the prompt, within incident_detail_budget."""
+        remaining = self.incident_detail_budget
+
+        kept_metrics = {}
+        for key, value in metrics.items():
+            cost = count_tokens(f"{key}: {value}")
+            if cost > remaining:
+                break
+            kept_metrics[key] = value
+            remaining -= cost
+
+        kept_logs = []
+        for line in logs[:self.max_log_lines]:
+            line = _truncate(line, self.max_log_line_chars)
+            cost = count_tokens(line)
+            if cost > remaining:
+                break
+            kept_logs.append(line)
+            remaining -= cost
+
+        return kept_logs, kept_metrics
+
+    def _summarize_tool_result(self, content: str) -> str:
+        try:
+            result = json.loads(content)
+        except (TypeError, ValueError):
+            return _truncate(str(content), self.summary_chars)
+        if not isinstance(result, dict):
+            return _truncate(content, self.summary_chars)
+        summary = {k: result[k] for k in SUMMARY_KEYS if k in result}
+        return _truncate(json.dumps(summary or result), self.summary_chars)
+
+    def compact_history(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Compact every turn before the latest AI message.
+
+        Tool results become short summaries and model text is truncated; tool
+        calls and tool_call_ids are kept so the conversation stays valid.
+        """
+        last_ai = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+        compacted = []
+        for i, message in enumerate(messages):
+            if i < last_ai and isinstance(message, ToolMessage):
+                message = ToolMessage(
+                    content=self._summarize_tool_result(message.content),
+                    tool_call_id=message.tool_call_id
+                )
+            elif i < last_ai and isinstance(message, AIMessage) and isinstance(message.content, str):
+                message = AIMessage(
+                    content=_truncate(message.content, self.summary_chars),
+                    tool_calls=message.tool_calls
+                )
+            compacted.append(message)
+        return compacted
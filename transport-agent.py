@@ -3,16 +3,15 @@ from langchain_core.tools import tool
 #from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 from datetime import datetime
 from models import Ticket, Incident, IncidentReport, IncidentContext
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
+import asyncio
 import json
 from langchain_openai import ChatOpenAI 
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage,ToolMessage
 import sqlite3
 from datetime import datetime
-import httpx
-
-client = httpx.Client(verify=False) 
+from http_clients import HTTPClientConfig, get_async_client
 
 load_dotenv()
 
@@ -21,12 +20,25 @@ from tools import create_jira_issue, send_slack_alert, create_pagerduty_incident
 class IntelligentTicketingAgent:
     """Intelligent agent that autonomously decides which MCP tools to call"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        llm_timeout: float = 60.0,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        default_tool_timeout: float = 30.0,
+        http_config: Optional[HTTPClientConfig] = None
+    ):
+        # Upper bound on a single LLM round trip; a hung backend must not
+        # hold an incident decision forever.
+        self.llm_timeout = llm_timeout
+        # Per-tool timeouts (by tool name), so a slow Jira cannot delay a page.
+        self.tool_timeouts = dict(tool_timeouts or {})
+        self.default_tool_timeout = default_tool_timeout
         self.llm = ChatOpenAI( 
             base_url="https://genailab.tcs.in", 
             model = "azure/genailab-maas-gpt-4o", 
             api_key="sk-vnedOvmLAuyelJh-X1G-tA", 
-            http_client = client
+            # Shared pooled async client (TLS verification was off for this endpoint)
+            http_async_client = get_async_client(http_config or HTTPClientConfig.from_env(verify=False))
         )
         
         # Define the tools the LLM can use
@@ -61,6 +73,67 @@ class IntelligentTicketingAgent:
         
         return "\n".join(parts)
     
+    async def _execute_tool_call(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one tool call, bounded by that tool's timeout."""
+        tool_name = tool_call["name"]
+        tool_args = tool_call["args"]
+        timeout = self.tool_timeouts.get(tool_name, self.default_tool_timeout)
+
+        # Call the actual MCP function
+        if tool_name == "create_jira_issue":
+            call = create_jira_issue.ainvoke(tool_args)
+        elif tool_name == "send_slack_alert":
+            call = send_slack_alert.ainvoke(tool_args)
+        elif tool_name == "create_pagerduty_incident":
+            call = create_pagerduty_incident.ainvoke(tool_args)
+        else:
+            return {"status": "error", "message": f"Unknown tool: {tool_name}"}
+
+        try:
+            return await asyncio.wait_for(call, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{tool_name} timed out after {timeout}s") from None
+
+    def _record_tool_result(
+        self,
+        incident: Incident,
+        tool_name: str,
+        tool_args: Dict[str, Any],
+        result: Dict[str, Any],
+        tickets: List[Ticket],
+        actions: List[str]
+    ):
+        """Build tickets and actions for the response from a tool result"""
+        if tool_name == "create_jira_issue" and result.get("status") == "success":
+            tickets.append(Ticket(
+                ticket_id=result['ticket_id'],
+                incident_id=incident.id,
+                platform="Jira",
+                title=tool_args["summary"],
+                description=tool_args["description"],
+                priority=tool_args["priority"],
+                assignee=None,
+                created_at=datetime.now().isoformat()
+            ))
+            actions.append(f"✅ Jira: {result['ticket_id']} (Priority: {tool_args['priority']})")
+        
+        elif tool_name == "create_pagerduty_incident" and result.get("status") == "success":
+            tickets.append(Ticket(
+                ticket_id=result['incident_id'],
+                incident_id=incident.id,
+                platform="PagerDuty",
+                title=tool_args["title"],
+                description=tool_args["description"],
+                priority=incident.severity.value,
+                assignee="On-call Engineer",
+                created_at=datetime.now().isoformat(),
+                url=result['url']
+            ))
+            actions.append(f"🚨 PagerDuty: {result['incident_id']} (Urgency: {tool_args['urgency']})")
+        
+        elif tool_name == "send_slack_alert" and result.get("status") == "success":
+            actions.append(f"💬 Slack: {tool_args['channel']}")
+    
     async def make_decision_and_execute(
         self, 
         incident: Incident, 
@@ -138,8 +211,12 @@ Think through your decision and call the appropriate tools now."""
             print(f"\n--- Iteration {iteration + 1} ---")
             
             try:
-                # Get LLM response with tool binding
-                response = self.llm_with_tools.invoke(messages)
+                # Get LLM response with tool binding (async, so other incidents
+                # and queue work keep running while we wait on the model)
+                response = await asyncio.wait_for(
+                    self.llm_with_tools.ainvoke(messages),
+                    timeout=self.llm_timeout
+                )
                 print("-------------------res-----------")
                 print(response)
                 
@@ -150,8 +227,14 @@ Think through your decision and call the appropriate tools now."""
                     # Add AI response to conversation
                     messages.append(response)
                     
-                    # Execute each tool call
-                    for tool_call in response.tool_calls:
+                    # Run independent tool calls of this turn concurrently;
+                    # gather keeps results in tool_call order.
+                    results = await asyncio.gather(
+                        *(self._execute_tool_call(tool_call) for tool_call in response.tool_calls),
+                        return_exceptions=True
+                    )
+
+                    for tool_call, result in zip(response.tool_calls, results):
                         tool_name = tool_call["name"]
                         tool_args = tool_call["args"]
                         tool_id = tool_call.get("id", "unknown")
@@ -159,17 +242,9 @@ Think through your decision and call the appropriate tools now."""
                         print(f"\n  Tool: {tool_name}")
                         print(f"  Args: {json.dumps(tool_args, indent=4)}")
                         
-                        # Execute the tool directly based on name
                         try:
-                            # Call the actual MCP function
-                            if tool_name == "create_jira_issue":
-                                result = await create_jira_issue.ainvoke(tool_args)
-                            elif tool_name == "send_slack_alert":
-                                result = await send_slack_alert.ainvoke(tool_args)
-                            elif tool_name == "create_pagerduty_incident":
-                                result = await create_pagerduty_incident.ainvoke(tool_args)
-                            else:
-                                result = {"status": "error", "message": f"Unknown tool: {tool_name}"}
+                            if isinstance(result, BaseException):
+                                raise result
                             
                             print(f"  Result: {result}")
                             
@@ -180,36 +255,7 @@ Think through your decision and call the appropriate tools now."""
                                 "result": result
                             })
                             
-                            # Build tickets and actions for response
-                            if tool_name == "create_jira_issue" and result.get("status") == "success":
-                                tickets.append(Ticket(
-                                    ticket_id=result['ticket_id'],
-                                    incident_id=incident.id,
-                                    platform="Jira",
-                                    title=tool_args["summary"],
-                                    description=tool_args["description"],
-                                    priority=tool_args["priority"],
-                                    assignee=None,
-                                    created_at=datetime.now().isoformat()
-                                ))
-                                actions.append(f"✅ Jira: {result['ticket_id']} (Priority: {tool_args['priority']})")
-                            
-                            elif tool_name == "create_pagerduty_incident" and result.get("status") == "success":
-                                tickets.append(Ticket(
-                                    ticket_id=result['incident_id'],
-                                    incident_id=incident.id,
-                                    platform="PagerDuty",
-                                    title=tool_args["title"],
-                                    description=tool_args["description"],
-                                    priority=incident.severity.value,
-                                    assignee="On-call Engineer",
-                                    created_at=datetime.now().isoformat(),
-                                    url=result['url']
-                                ))
-                                actions.append(f"🚨 PagerDuty: {result['incident_id']} (Urgency: {tool_args['urgency']})")
-                            
-                            elif tool_name == "send_slack_alert" and result.get("status") == "success":
-                                actions.append(f"💬 Slack: {tool_args['channel']}")
+                            self._record_tool_result(incident, tool_name, tool_args, result, tickets, actions)
                             
                             # Send tool result back to LLM
                             messages.append(ToolMessage(
@@ -219,7 +265,7 @@ Think through your decision and call the appropriate tools now."""
                         
                         except Exception as e:
                             print(f"  ❌ Error executing tool: {e}")
-                            error_result = {"status": "error", "message": str(e)}
+                            error_result = {"status": "error", "message": str(e) or type(e).__name__}
                             messages.append(ToolMessage(
                                 content=json.dumps(error_result),
                                 tool_call_id=tool_id
@@ -233,6 +279,10 @@ Think through your decision and call the appropriate tools now."""
                         print(f"\nReasoning: {reasoning_text[:300]}...")
                     break
             
+            except asyncio.TimeoutError:
+                print(f"\n❌ LLM call timed out after {self.llm_timeout}s")
+                break
+
             except Exception as e:
                 print(f"\n❌ Error in agent loop: {e}")
                 import traceback